@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+
+
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_EXTENSIONS = (
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".woff", ".woff2",
+)
+
+
+class AssetMap:
+    # Maps each asset's plain URL to its fingerprinted URL, e.g.
+    # "/index.css" -> "/index.3f2a1b9c0d.css".
+    def __init__(self, urls=None):
+        self.urls = urls if urls is not None else {}
+        self._fingerprint = None
+
+    def add(self, url, fingerprinted_url):
+        self.urls[url] = fingerprinted_url
+        self._fingerprint = None
+
+    def get(self, url, default=None):
+        return self.urls.get(url, default)
+
+    def fingerprint(self):
+        if self._fingerprint is None:
+            data = json.dumps(self.urls, sort_keys=True)
+            self._fingerprint = hashlib.sha256(data.encode()).hexdigest()
+        return self._fingerprint
+
+    def __len__(self):
+        return len(self.urls)
+
+
+def should_fingerprint(path):
+    return path.lower().endswith(FINGERPRINT_EXTENSIONS)
+
+def fingerprinted_name(path, digest):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+def site_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
+
+def known_hashes(manifest):
+    # Hashes recorded by earlier builds, keyed by source path, size and
+    # mtime, so unchanged assets are not hashed again.
+    hashes = {}
+    if manifest is None:
+        return hashes
+    for entry in manifest.entries.values():
+        inputs = entry["inputs"]
+        if entry.get("kind") == "static" and "hash" in inputs:
+            hashes[(entry["source"], inputs["size"], inputs["mtime"])] = inputs["hash"]
+    return hashes
@@ -0,0 +1,52 @@
+import io
+import os
+import sys
+import timeit
+
+from htmlnode import LeafNode, ParentNode
+
+
+def concat_to_html(node):
+    # The previous ParentNode.to_html, kept as a baseline for comparison.
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    children_html = ""
+    for child in node.children:
+        children_html += concat_to_html(child)
+    return f"<{node.tag}{node.props_to_html()}>{children_html}</{node.tag}>"
+
+
+def build_list(items):
+    return ParentNode("div", [
+        ParentNode("ul", [
+            ParentNode("li", [
+                LeafNode(None, f"item {i} with "),
+                LeafNode("b", "bold"),
+                LeafNode("a", "a link", {"href": f"/page/{i}"}),
+            ])
+            for i in range(items)
+        ])
+    ])
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<28}{seconds * 1000:9.2f} ms")
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    number = 10
+    node = build_list(items)
+    assert concat_to_html(node) == node.to_html()
+
+    print(f"{items} item list, {len(node.to_html())} characters")
+    bench("concatenation (old)", lambda: concat_to_html(node), number)
+    bench("to_html", node.to_html, number)
+    bench("write_html -> StringIO", lambda: node.write_html(io.StringIO()), number)
+    with open(os.devnull, "w") as f:
+        bench("write_html -> file", lambda: node.write_html(f), number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+def sample_nodes(count):
+    kinds = [
+        (TextType.TEXT, None),
+        (TextType.BOLD, None),
+        (TextType.ITALIC, None),
+        (TextType.CODE, None),
+        (TextType.LINK, "/blog/post"),
+        (TextType.IMAGE, "/images/tom.png"),
+    ]
+    return [
+        TextNode("span text", text_type, url)
+        for i in range(count)
+        for text_type, url in [kinds[i % len(kinds)]]
+    ]
+
+
+def measure(label, build, count):
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{current / count:8.1f} bytes/node{elapsed * 1000:10.1f} ms")
+    return objects
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{count} nodes, mix of text, bold, italic, code, link and image")
+    text_nodes = measure("TextNode", lambda: sample_nodes(count), count)
+    measure("LeafNode", lambda: [text_node_to_html_node(node) for node in text_nodes], count)
+
+
+if __name__ == "__main__":
+    main()
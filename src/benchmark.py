@@ -0,0 +1,247 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import block_markdown
+from block_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from corpus import CorpusShape, generate_corpus, write_corpus
+from gencontent import extract_title, generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from search import build_search_index
+from template import compile_template
+
+
+BENCHMARK_VERSION = 1
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>"""
+
+
+def time_stage(func, repeat):
+    # Like timeit, keep the collector out of the measurements.
+    runs = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return runs
+
+
+def capture_inline_texts(pages):
+    # Record exactly what the block renderers hand to the inline parser.
+    texts = []
+    original = block_markdown.text_to_textnodes
+
+    def recording(text):
+        texts.append(text)
+        return original(text)
+
+    block_markdown.text_to_textnodes = recording
+    try:
+        for _, markdown in pages:
+            markdown_to_html_node(markdown)
+    finally:
+        block_markdown.text_to_textnodes = original
+    return texts
+
+
+def run_benchmark(shape, repeat=5):
+    pages = generate_corpus(shape)
+    markdowns = [markdown for _, markdown in pages]
+    blocks = [block for markdown in markdowns for block in markdown_to_blocks(markdown)]
+    inline_texts = capture_inline_texts(pages)
+    nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+    titles = [extract_title(markdown) for markdown in markdowns]
+    contents = [node.to_html() for node in nodes]
+    template = compile_template(TEMPLATE, "/base")
+    rendered = [template.render({"Title": t, "Content": c}) for t, c in zip(titles, contents)]
+
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(markdown) for markdown in markdowns],
+        "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in inline_texts],
+        "to_html": lambda: [node.to_html() for node in nodes],
+        "template": lambda: [
+            template.render({"Title": t, "Content": c}) for t, c in zip(titles, contents)
+        ],
+    }
+    results = {}
+    for name, func in stages.items():
+        results[name] = time_stage(func, repeat)
+
+    tmp_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        content_dir = os.path.join(tmp_dir, "content")
+        write_corpus(pages, content_dir)
+        out_dir = os.path.join(tmp_dir, "out")
+        paths = [os.path.join(out_dir, f"{i}.html") for i in range(len(rendered))]
+        os.makedirs(out_dir)
+        source_paths = [os.path.join(content_dir, path) for path, _ in pages]
+
+        def file_io():
+            for path in source_paths:
+                with open(path, "r") as f:
+                    f.read()
+            for path, html in zip(paths, rendered):
+                with open(path, "w") as f:
+                    f.write(html)
+
+        template_path = os.path.join(tmp_dir, "template.html")
+        with open(template_path, "w") as f:
+            f.write(TEMPLATE)
+        build_dir = os.path.join(tmp_dir, "build")
+
+        def full_build():
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    generate_pages_recursive(content_dir, template_path, build_dir, "/base")
+                finally:
+                    sys.stdout = stdout
+
+        search_pages = [
+            (source_path, os.path.join(build_dir, path[:-3] + ".html"))
+            for source_path, (path, _) in zip(source_paths, pages)
+        ]
+        search_cache_path = os.path.join(tmp_dir, "search.json")
+
+        def search_index():
+            if os.path.exists(search_cache_path):
+                os.remove(search_cache_path)
+            return build_search_index(search_pages, build_dir, "/base", search_cache_path)
+
+        results["file_io"] = time_stage(file_io, repeat)
+        results["full_build"] = time_stage(full_build, repeat)
+        results["search_index"] = time_stage(search_index, repeat)
+        results["search_incremental"] = time_stage(
+            lambda: build_search_index(search_pages, build_dir, "/base", search_cache_path), repeat,
+        )
+        search_stats = search_index()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "shape": shape.to_dict(),
+        "corpus": {
+            "pages": len(pages),
+            "markdown_bytes": sum(len(markdown.encode()) for markdown in markdowns),
+            "html_bytes": sum(len(html.encode()) for html in rendered),
+            "blocks": len(blocks),
+            "inline_texts": len(inline_texts),
+            "search_index_bytes": search_stats["bytes"],
+            "search_shards": search_stats["shards"],
+        },
+        "stages": {
+            name: {
+                "min": min(runs),
+                "median": sorted(runs)[len(runs) // 2],
+                "per_page_us": min(runs) / len(pages) * 1e6,
+                "runs": runs,
+            }
+            for name, runs in results.items()
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    print(f"{'stage':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, stage in current["stages"].items():
+        if name not in baseline["stages"]:
+            continue
+        before = baseline["stages"][name]["min"]
+        after = stage["min"]
+        change = (after - before) / before if before else 0.0
+        flag = " REGRESSION" if change > threshold else ""
+        print(f"{name:<22}{before * 1000:10.2f}ms{after * 1000:10.2f}ms{change:+9.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generator on a synthetic site.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--block-mix", type=parse_mix, help="e.g. paragraph=6,ulist=2,code=1")
+    parser.add_argument("--inline-density", type=float, default=0.1, help="fraction of words with markup")
+    parser.add_argument("--inline-mix", type=parse_mix, help="e.g. bold=3,italic=3,link=2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    shape = CorpusShape(
+        pages=args.pages,
+        depth=args.depth,
+        fanout=args.fanout,
+        blocks=args.blocks,
+        block_mix=args.block_mix,
+        inline_density=args.inline_density,
+        inline_mix=args.inline_mix,
+        seed=args.seed,
+    )
+    results = run_benchmark(shape, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
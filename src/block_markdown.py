@@ -1,10 +1,17 @@
+import re
 from enum import Enum
 from htmlnode import ParentNode
-from inline_markdown import text_to_textnodes
+from inline_markdown import media_targets, text_to_textnodes
+from profiling import stage_timer
 from textnode import text_node_to_html_node, TextNode, TextType
 
 
 
+# Short blocks render faster than a cache lookup.
+MIN_CACHED_BLOCK_SIZE = 200
+URL_SCHEME_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -24,125 +31,231 @@ def markdown_to_blocks(markdown):
         filtered_blocks.append(block)
     return filtered_blocks
 
-def block_to_block_type(block):
-    lines = block.split("\n")
+def iter_block_spans(chunks):
+    # Streaming equivalent of markdown_to_blocks: consumes text in chunks
+    # (lines of a file or fixed-size reads) and yields each block as soon
+    # as the separator ending it has been read, along with the character
+    # offsets of the stripped block in the source. Only the current block
+    # is held in memory.
+    pieces = []
+    offset = 0
+    for chunk in chunks:
+        if chunk == "":
+            continue
+        if pieces and pieces[-1].endswith("\n") and chunk.startswith("\n"):
+            # The separator straddles two chunks; move it into this one.
+            pieces[-1] = pieces[-1][:-1]
+            chunk = "\n" + chunk
+        parts = chunk.split("\n\n")
+        if len(parts) == 1:
+            pieces.append(chunk)
+            continue
+        pieces.append(parts[0])
+        for raw in ["".join(pieces), *parts[1:-1]]:
+            if raw != "":
+                yield block_span(raw, offset)
+            offset += len(raw) + 2
+        pieces = [parts[-1]]
+    raw = "".join(pieces)
+    if raw != "":
+        yield block_span(raw, offset)
+
+def block_span(raw, offset):
+    text = raw.strip()
+    start = offset + len(raw) - len(raw.lstrip())
+    return text, start, start + len(text)
+
+
+class Block:
+    __slots__ = ("block_type", "text", "start", "end", "level", "content", "items")
+
+    def __init__(self, block_type, text, start, end, level=0, content=None, items=None):
+        self.block_type = block_type
+        self.text = text
+        self.start = start
+        self.end = end
+        self.level = level
+        self.content = content
+        self.items = items
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
+    def __repr__(self):
+        return f"Block({self.block_type}, {self.start}-{self.end}, {self.text!r})"
+
+
+def parse_block(text, start=0):
+    # Classifies a block in one pass over its lines and keeps what the
+    # renderer needs: inline text for headings, paragraphs and quotes,
+    # the body for code and the item texts for lists.
+    end = start + len(text)
+    if text.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        level = text.index(" ")
+        return Block(BlockType.HEADING, text, start, end, level, text[level + 1 :])
+    lines = text.split("\n")
     if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
+        return Block(BlockType.CODE, text, start, end, content=text[4:-3])
+    if text.startswith(">"):
+        content = []
         for line in lines:
             if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
+                return paragraph_block(text, start, end, lines)
+            content.append(line.lstrip(">").strip())
+        return Block(BlockType.QUOTE, text, start, end, content=" ".join(content))
+    if text.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
+                return paragraph_block(text, start, end, lines)
+        return Block(BlockType.ULIST, text, start, end, items=[line[2:] for line in lines])
+    if text.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
+                return paragraph_block(text, start, end, lines)
             i += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
+        return Block(BlockType.OLIST, text, start, end, items=[line[3:] for line in lines])
+    return paragraph_block(text, start, end, lines)
+
+def paragraph_block(text, start, end, lines):
+    return Block(BlockType.PARAGRAPH, text, start, end, content=" ".join(lines))
+
+def block_to_block_type(block):
+    return parse_block(block).block_type
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, context=None):
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    for text, start, end in iter_block_spans([markdown]):
+        children.append(parsed_block_to_html_node(parse_block(text, start), context))
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def write_markdown_html(lines, sink, cache=None, context=None, minifier=None, links=None, profiler=None):
+    sink.write("<div>")
+    variant = "" if context is None else context.fingerprint()
+    if profiler is not None:
+        lines = profiler.timed_iter("read", lines)
+    for text, start, end in iter_block_spans(lines):
+        if links is not None:
+            collect_block_links(text, start, links)
+        if cache is not None and len(text) >= MIN_CACHED_BLOCK_SIZE:
+            with stage_timer(profiler, "cache"):
+                key, html, saved = cache.get(text, variant)
+            if html is None:
+                with stage_timer(profiler, "parse"):
+                    node = parsed_block_to_html_node(parse_block(text, start), context)
+                with stage_timer(profiler, "serialize"):
+                    saved = 0 if minifier is None else minifier.saved
+                    html = node.to_html(minifier)
+                    saved = 0 if minifier is None else minifier.saved - saved
+                with stage_timer(profiler, "cache"):
+                    cache.put(key, html, saved)
+            elif minifier is not None:
+                minifier.saved += saved
+            with stage_timer(profiler, "write"):
+                sink.write(html)
+        else:
+            with stage_timer(profiler, "parse"):
+                node = parsed_block_to_html_node(parse_block(text, start), context)
+            # Nodes are streamed into the sink, so this includes the write.
+            with stage_timer(profiler, "serialize"):
+                node.write_html(sink, minifier)
+    sink.write("</div>")
+
+
+def collect_block_links(text, start, links):
+    # Appends (url, offset) for each internal link or image target in
+    # the block, found with the inline parser's own patterns and span
+    # rules. Runs on cached blocks too, so it never needs the parsed nodes.
+    if "](" not in text:
+        return
+    block_type = parse_block(text, start).block_type
+    if block_type == BlockType.CODE:
+        return
+    if block_type in (BlockType.ULIST, BlockType.OLIST):
+        # List items are parsed one line at a time.
+        spans = []
+        offset = start
+        for line in text.split("\n"):
+            spans.append((line, offset))
+            offset += len(line) + 1
+    else:
+        spans = [(text, start)]
+    for span, offset in spans:
+        for url, url_offset in media_targets(span, offset):
+            if is_site_url(url):
+                links.append((url, url_offset))
+
+def is_site_url(url):
+    # Site-absolute ("/blog/") and relative ("../tom/", "page.html")
+    # targets; not other sites, other schemes or same-page fragments.
+    return url != "" and not url.startswith(("//", "#")) and URL_SCHEME_RE.match(url) is None
+
+def markdown_links(markdown):
+    links = []
+    for text, start, end in iter_block_spans([markdown]):
+        collect_block_links(text, start, links)
+    return links
+
+
+def block_to_html_node(block, context=None):
+    return parsed_block_to_html_node(parse_block(block), context)
+
+
+def parsed_block_to_html_node(block, context=None):
+    block_type = block.block_type
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(block, context)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(block, context)
     if block_type == BlockType.CODE:
         return code_to_html_node(block)
     if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(block, context)
     if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(block, context)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, context)
     raise ValueError("invalid block type")
 
 
-def text_to_children(text):
+def text_to_children(text, context=None):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, context)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+def paragraph_to_html_node(block, context=None):
+    return ParentNode("p", text_to_children(block.content, context))
 
 
-def heading_to_html_node(block):
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
-    if level + 1 >= len(block):
-        raise ValueError(f"invalid heading level: {level}")
-    text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+def heading_to_html_node(block, context=None):
+    return ParentNode(f"h{block.level}", text_to_children(block.content, context))
 
 
 def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
-        raise ValueError("invalid code block")
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
+    if not block.text.endswith("```"):
+        raise ValueError(f"invalid code block at characters {block.start}-{block.end}")
+    raw_text_node = TextNode(block.content, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
     code = ParentNode("code", [child])
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
+def olist_to_html_node(block, context=None):
+    return list_to_html_node("ol", block.items, context)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, context=None):
+    return list_to_html_node("ul", block.items, context)
+
+
+def list_to_html_node(tag, items, context=None):
     html_items = []
     for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
-
-
-def quote_to_html_node(block):
-    lines = block.split("\n")
-    new_lines = []
-    for line in lines:
-        if not line.startswith(">"):
-            raise ValueError("invalid quote block")
-        new_lines.append(line.lstrip(">").strip())
-    content = " ".join(new_lines)
-    children = text_to_children(content)
-    return ParentNode("blockquote", children)
\ No newline at end of file
+        html_items.append(ParentNode("li", text_to_children(item, context)))
+    return ParentNode(tag, html_items)
+
+
+def quote_to_html_node(block, context=None):
+    return ParentNode("blockquote", text_to_children(block.content, context))
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from manifest import generator_hash
+
+
+SCHEMA_VERSION = 2
+
+
+class BlockCache:
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.pending_uses = []
+        self.connection = None
+        # Any change to the generator's code changes every key.
+        self.version = generator_hash()
+
+    def open(self):
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=60)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Older layouts are simply rebuilt; the cache is disposable.
+                self.connection.execute("DROP TABLE IF EXISTS blocks")
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT NOT NULL, "
+                "saved INTEGER NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL)"
+            )
+        return self.connection
+
+    def key(self, block, variant=""):
+        # variant separates renders of the same text under different
+        # render contexts.
+        return hashlib.sha256(f"{self.version}\0{variant}\0{block}".encode()).hexdigest()
+
+    def get(self, block, variant=""):
+        key = self.key(block, variant)
+        row = self.open().execute("SELECT html, saved FROM blocks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return key, None, 0
+        self.hits += 1
+        self.pending_uses.append((time.time_ns(), key))
+        return key, row[0], row[1]
+
+    def put(self, key, html, saved=0):
+        # saved is what minification removed from html, so cached blocks
+        # still count towards the bytes-saved report.
+        self.open().execute(
+            "INSERT OR REPLACE INTO blocks (key, html, saved, size, used) VALUES (?, ?, ?, ?, ?)",
+            (key, html, saved, len(html.encode()), time.time_ns()),
+        )
+
+    def commit(self):
+        if self.connection is None:
+            return
+        if self.pending_uses:
+            self.connection.executemany("UPDATE blocks SET used = ? WHERE key = ?", self.pending_uses)
+            self.pending_uses = []
+        self.connection.commit()
+
+    def evict(self, max_bytes):
+        # Drop least recently used blocks until the cache fits in max_bytes.
+        connection = self.open()
+        total = 0
+        stale = []
+        for key, size in connection.execute("SELECT key, size FROM blocks ORDER BY used DESC, rowid DESC"):
+            total += size
+            if total > max_bytes:
+                stale.append((key,))
+        connection.executemany("DELETE FROM blocks WHERE key = ?", stale)
+        connection.commit()
+        return len(stale)
+
+    def close(self):
+        if self.connection is not None:
+            self.commit()
+            self.connection.close()
+            self.connection = None
+
+
+_open_caches = {}
+
+def get_block_cache(path):
+    # One connection per process; pool workers reuse theirs across pages.
+    cache = _open_caches.get(path)
+    if cache is None:
+        cache = _open_caches[path] = BlockCache(path)
+    return cache
+
+
+def format_cache_stats(stats):
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / lookups if lookups else 0.0
+    return f"{stats['hits']} hits, {stats['misses']} misses ({rate:.0%} hit rate)"
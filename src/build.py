@@ -0,0 +1,189 @@
+import os
+import shutil
+
+from assets import AssetMap
+from blockcache import BlockCache, format_cache_stats
+from compress import compress_outputs
+from copystatic import sync_static_files
+from gencontent import collect_pages, generate_pages_recursive, page_build_inputs
+from images import build_image_catalog
+from linkcheck import check_links, format_broken_link
+from listing import build_listings
+from manifest import BuildManifest
+from profiling import stage_timer
+from rendercontext import RenderContext
+from search import build_search_index
+from shards import merge_shard_manifests, shard_path
+
+
+dir_path_static = "./static"
+dir_path_public = "./docs"
+dir_path_content = "./content"
+template_path = "./template.html"
+manifest_path = "./.cache/build-manifest.json"
+block_cache_path = "./.cache/blocks.sqlite3"
+image_cache_dir = "./.cache/images"
+search_cache_path = "./.cache/search.json"
+listing_cache_path = "./.cache/listings.json"
+
+def build_site(basepath, *, clean=False, hash_static=False, jobs=1, profiler=None, block_cache_size=None, pipeline=0, compress_min_size=None, images=False, fingerprint=False, minify=False, search=False, shard=None, merge_shards=None, listing_dirs=(), listing_page_size=10):
+    if profiler is not None:
+        profiler.start()
+    if shard is not None:
+        return build_shard(basepath, shard, jobs, profiler, block_cache_size, pipeline, minify)
+    manifest = BuildManifest(manifest_path, dir_path_public)
+    if clean:
+        print("Deleting public directory...")
+        if os.path.exists(dir_path_public):
+            shutil.rmtree(dir_path_public)
+    else:
+        manifest.load()
+
+    print("Syncing static files to public directory...")
+    assets = AssetMap() if fingerprint else None
+    with stage_timer(profiler, "static"):
+        stats = sync_static_files(dir_path_static, dir_path_public, manifest, hash_static, assets)
+    print(f"Static files: {stats['copied']} copied, {stats['skipped']} skipped, {stats['removed']} removed")
+    catalog = None
+    if images:
+        print("Processing images...")
+        with stage_timer(profiler, "images"):
+            catalog, resized = build_image_catalog(
+                dir_path_static, dir_path_public, image_cache_dir, manifest, jobs, assets,
+            )
+        print(f"Images: {len(catalog)} found, {resized} variant(s) resized")
+    else:
+        manifest.remove_orphans("image")
+    if assets is not None:
+        print(f"Assets: {len(assets)} fingerprinted")
+    context = None
+    if images or fingerprint or minify:
+        context = RenderContext(basepath, catalog, assets, minify)
+    cache_path = block_cache_path if block_cache_size else None
+    page_stats = {"hits": 0, "misses": 0, "minified_pages": 0, "minified_bytes": 0}
+    try:
+        if merge_shards is None:
+            print("Generating content pages...")
+            generate_pages_recursive(
+                dir_path_content,
+                template_path,
+                dir_path_public,
+                basepath,
+                manifest,
+                jobs,
+                profiler,
+                cache_path,
+                page_stats,
+                pipeline,
+                context,
+            )
+        else:
+            print("Merging shard manifests...")
+            with stage_timer(profiler, "merge"):
+                merged = merge_shard_manifests(
+                    manifest, manifest_path, collect_pages(dir_path_content, dir_path_public),
+                    dir_path_content, merge_shards, page_build_inputs(template_path, basepath, context),
+                )
+            print(f"Merged {merged} page(s) from {merge_shards} shard(s)")
+        for dest_path in manifest.remove_orphans("page"):
+            print(f" * removed orphaned page {dest_path}")
+            manifest.removed += 1
+        if listing_dirs:
+            with stage_timer(profiler, "listings"):
+                stats = build_listings(
+                    listing_dirs, dir_path_content, dir_path_public, template_path, basepath,
+                    listing_page_size, listing_cache_path, manifest, context,
+                )
+            print(
+                f"Listings: {stats['posts']} post(s) in {stats['pages']} page(s), "
+                f"{stats['rendered']} rendered, {stats['skipped']} skipped, {stats['parsed']} post(s) parsed"
+            )
+        else:
+            manifest.remove_orphans("listing")
+        if search:
+            with stage_timer(profiler, "search"):
+                stats = build_search_index(
+                    collect_pages(dir_path_content, dir_path_public), dir_path_public, basepath,
+                    search_cache_path, manifest,
+                )
+            print(
+                f"Search index: {stats['pages']} page(s), {stats['indexed']} re-indexed, "
+                f"{stats['shards']} shard(s), {stats['bytes']} bytes, {stats['written']} file(s) written"
+            )
+        else:
+            manifest.remove_orphans("search")
+        with stage_timer(profiler, "links"):
+            checked, broken = check_links(manifest, dir_path_public, assets)
+        print(f"Links: {checked} internal link(s) checked, {len(broken)} broken")
+        for source, offset, url in broken:
+            print(f" * {format_broken_link(source, offset, url)}")
+        if compress_min_size is not None:
+            with stage_timer(profiler, "compress"):
+                stats = compress_outputs(manifest, jobs, compress_min_size)
+            print(
+                f"Compressed files: {stats['compressed']} compressed, "
+                f"{stats['skipped']} skipped, {stats['removed']} removed"
+            )
+        else:
+            # Stale siblings would be served in place of the new outputs.
+            manifest.remove_orphans("compressed")
+    finally:
+        manifest.save()
+    print(f"Pages: {manifest.summary()}")
+    if cache_path is not None:
+        cache = BlockCache(cache_path)
+        evicted = cache.evict(block_cache_size)
+        cache.close()
+        print(f"Block cache: {format_cache_stats(page_stats)}, {evicted} evicted")
+    if minify:
+        print(f"Minified: {page_stats['minified_bytes']} bytes saved across {page_stats['minified_pages']} page(s)")
+    print("Site generation complete.")
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.report())
+    return manifest, context
+
+def build_shard(basepath, shard, jobs=1, profiler=None, block_cache_size=None, pipeline=0, minify=False):
+    # Renders only the pages assigned to this shard, recording them in a
+    # partial manifest next to the main one. Shards share nothing but the
+    # output directory, so they can run as separate processes or on
+    # separate machines; `main.py merge` then syncs static files and runs
+    # the site-wide steps once.
+    manifest = BuildManifest(shard_path(manifest_path, shard), dir_path_public, shard).load()
+    context = RenderContext(basepath, minify=True) if minify else None
+    # Each shard keeps its own block cache: SQLite locking is not reliable
+    # on the network filesystems CI runners share.
+    cache_path = shard_path(block_cache_path, shard) if block_cache_size else None
+    page_stats = {"hits": 0, "misses": 0, "minified_pages": 0, "minified_bytes": 0}
+    print(f"Generating content pages for shard {shard[0]}/{shard[1]}...")
+    try:
+        generate_pages_recursive(
+            dir_path_content,
+            template_path,
+            dir_path_public,
+            basepath,
+            manifest,
+            jobs,
+            profiler,
+            cache_path,
+            page_stats,
+            pipeline,
+            context,
+            shard,
+        )
+        for dest_path in manifest.remove_orphans("page"):
+            print(f" * removed orphaned page {dest_path}")
+            manifest.removed += 1
+    finally:
+        manifest.save()
+    print(f"Pages: {manifest.summary()}")
+    if cache_path is not None:
+        cache = BlockCache(cache_path)
+        evicted = cache.evict(block_cache_size)
+        cache.close()
+        print(f"Block cache: {format_cache_stats(page_stats)}, {evicted} evicted")
+    print(f"Shard {shard[0]}/{shard[1]} complete; run `main.py merge --shards {shard[1]}` once every shard is done.")
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.report())
+    return manifest, context
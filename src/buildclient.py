@@ -0,0 +1,54 @@
+import argparse
+import json
+import socket
+import sys
+
+
+# Deliberately imports nothing from the generator, so it starts quickly.
+DEFAULT_SOCKET_PATH = "./.cache/daemon.sock"
+
+
+def send_request(socket_path, request, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("the build daemon closed the connection without answering")
+    return json.loads(line)
+
+def format_response(command, response):
+    if not response.get("ok"):
+        return f"{command} failed: {response.get('error')}"
+    if command == "build":
+        if not response["changed"] and not response["rendered"]:
+            return f"Up to date ({response['elapsed_ms']} ms)"
+        return (
+            f"Built in {response['elapsed_ms']} ms: {response['changed']} file(s) changed, "
+            f"{response['rendered']} page(s) rendered, {response['copied']} static file(s) copied, "
+            f"{response['removed']} output(s) removed, {response['broken_links']} broken link(s)"
+        )
+    if command == "status":
+        return f"{response['pages']} page(s), {response['builds']} build(s), up {response['uptime_s']} s"
+    return "Build daemon stopping."
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a request to a running build daemon.")
+    parser.add_argument("command", nargs="?", default="build", choices=("build", "status", "stop"))
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"daemon socket (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--json", action="store_true", help="print the raw JSON response")
+    args = parser.parse_args()
+    try:
+        response = send_request(args.socket, {"command": args.command})
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No build daemon is listening on {args.socket}; start one with `python3 src/main.py daemon`.")
+        sys.exit(2)
+    print(json.dumps(response) if args.json else format_response(args.command, response))
+    if not response.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
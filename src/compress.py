@@ -0,0 +1,122 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import hash_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map")
+MIN_COMPRESS_SIZE = 1024
+# Every suffix a sibling may have, including formats from builds that
+# had brotli installed.
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def compressed_formats():
+    if brotli is None:
+        return (".gz",)
+    return (".gz", ".br")
+
+
+def compress_bytes(data, suffix):
+    if suffix == ".gz":
+        # A fixed mtime keeps the output identical across builds.
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def compress_file(path, formats):
+    with open(path, "rb") as f:
+        data = f.read()
+    for suffix in formats:
+        tmp_path = path + suffix + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compress_bytes(data, suffix))
+        os.replace(tmp_path, path + suffix)
+
+
+def compress_outputs(manifest, jobs=1, min_size=MIN_COMPRESS_SIZE, dest_paths=None):
+    # Writes .gz (and .br when brotli is installed) siblings for every
+    # page and static file the manifest saw this build, or only for
+    # `dest_paths` (outputs written or removed since the last call). Each
+    # sibling remembers the size, mtime and hash of the output it was
+    # made from, so it is only regenerated when that output's bytes change.
+    formats = compressed_formats()
+    stats = {"compressed": 0, "skipped": 0, "removed": 0}
+    stale = []
+    if dest_paths is None:
+        dest_paths = manifest.seen
+        siblings = [path for path, entry in manifest.entries.items() if entry.get("kind") == "compressed"]
+    else:
+        siblings = [
+            dest_path + suffix for dest_path in dest_paths for suffix in COMPRESSED_SUFFIXES
+            if dest_path + suffix in manifest.entries
+        ]
+    for dest_path in siblings:
+        manifest.seen.discard(dest_path)
+    for dest_path in sorted(dest_paths):
+        entry = manifest.entries.get(dest_path)
+        if entry is None or entry.get("kind", "page") == "compressed":
+            continue
+        if not dest_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        try:
+            dest_stat = os.stat(dest_path)
+        except FileNotFoundError:
+            continue
+        if dest_stat.st_size < min_size:
+            continue
+        inputs = output_inputs(manifest, dest_path, dest_stat, formats)
+        if inputs is None:
+            stale.append(dest_path)
+            continue
+        for suffix in formats:
+            manifest.record(dest_path + suffix, dest_path, inputs, "compressed")
+        stats["skipped"] += 1
+
+    if jobs > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as executor:
+            list(executor.map(compress_file, stale, [formats] * len(stale)))
+    else:
+        for dest_path in stale:
+            compress_file(dest_path, formats)
+    for dest_path in stale:
+        dest_stat = os.stat(dest_path)
+        inputs = {"size": dest_stat.st_size, "mtime": dest_stat.st_mtime_ns, "hash": hash_file(dest_path)}
+        for suffix in formats:
+            manifest.record(dest_path + suffix, dest_path, inputs, "compressed")
+        stats["compressed"] += 1
+
+    for dest_path in siblings:
+        if dest_path not in manifest.seen:
+            manifest.remove(dest_path)
+            stats["removed"] += 1
+    return stats
+
+
+def output_inputs(manifest, dest_path, dest_stat, formats):
+    # Returns the recorded inputs if every sibling is still current, or
+    # None if the output has to be compressed again.
+    inputs = None
+    for suffix in formats:
+        entry = manifest.entries.get(dest_path + suffix)
+        if entry is None or not os.path.exists(dest_path + suffix):
+            return None
+        if inputs is None:
+            inputs = entry["inputs"]
+        elif entry["inputs"] != inputs:
+            return None
+    if inputs["size"] != dest_stat.st_size:
+        return None
+    if inputs["mtime"] != dest_stat.st_mtime_ns:
+        if inputs["hash"] != hash_file(dest_path):
+            return None
+        # Rewritten with the same bytes: remember the new mtime so the
+        # next build can skip the hash.
+        inputs = dict(inputs, mtime=dest_stat.st_mtime_ns)
+    return inputs
@@ -1,16 +1,82 @@
 import os
 import shutil
 
+from assets import fingerprinted_name, known_hashes, should_fingerprint, site_url
+from manifest import hash_file
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
-
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
\ No newline at end of file
+
+def sync_static_files(source_dir_path, dest_dir_path, manifest=None, use_hash=False, assets=None):
+    stats = {"copied": 0, "skipped": 0, "removed": 0}
+    if assets is None:
+        sync_files_recursive(source_dir_path, dest_dir_path, manifest, use_hash, stats)
+    else:
+        fingerprint_files(source_dir_path, dest_dir_path, manifest, use_hash, stats, assets)
+    if manifest is not None:
+        stats["removed"] = len(manifest.remove_orphans("static"))
+    return stats
+
+
+def sync_files_recursive(source_dir_path, dest_dir_path, manifest, use_hash, stats):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    for entry in sorted(os.scandir(source_dir_path), key=lambda entry: entry.name):
+        dest_path = os.path.join(dest_dir_path, entry.name)
+        if entry.is_dir():
+            sync_files_recursive(entry.path, dest_path, manifest, use_hash, stats)
+            continue
+        sync_file(entry.path, dest_path, manifest, use_hash, stats, entry.stat())
+
+
+def fingerprint_files(source_dir_path, dest_dir_path, manifest, use_hash, stats, assets):
+    # Copies assets as name.<hash>.ext and records them in the asset map.
+    # Other files keep their names. Hashes are reused from the manifest
+    # while a source's size and mtime are unchanged.
+    hashes = known_hashes(manifest)
+    for dir_path, dir_names, filenames in os.walk(source_dir_path):
+        dir_names.sort()
+        for filename in sorted(filenames):
+            source_path = os.path.join(dir_path, filename)
+            rel_path = os.path.relpath(source_path, source_dir_path)
+            source_stat = os.stat(source_path)
+            if not should_fingerprint(filename):
+                sync_file(source_path, os.path.join(dest_dir_path, rel_path), manifest, use_hash, stats, source_stat)
+                continue
+            digest = hashes.get((source_path, source_stat.st_size, source_stat.st_mtime_ns))
+            if digest is None:
+                digest = hash_file(source_path)
+            fingerprinted_path = fingerprinted_name(rel_path, digest)
+            dest_path = os.path.join(dest_dir_path, fingerprinted_path)
+            sync_file(source_path, dest_path, manifest, use_hash, stats, source_stat, digest)
+            assets.add(site_url(rel_path), site_url(fingerprinted_path))
+
+
+def sync_file(source_path, dest_path, manifest, use_hash, stats, source_stat=None, digest=None):
+    if source_stat is None:
+        source_stat = os.stat(source_path)
+    if is_up_to_date(source_path, source_stat, dest_path, use_hash):
+        stats["skipped"] += 1
+    else:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copy2(source_path, dest_path)
+        stats["copied"] += 1
+    if manifest is not None:
+        inputs = {"size": source_stat.st_size, "mtime": source_stat.st_mtime_ns}
+        if digest is not None:
+            inputs["hash"] = digest
+        manifest.record(dest_path, source_path, inputs, "static")
+
+
+def is_up_to_date(source_path, source_stat, dest_path, use_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == source_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(source_path) == hash_file(dest_path):
+        # Same bytes, new mtime (e.g. after a checkout): adopt the source
+        # mtime so the next build can skip the hash.
+        os.utime(dest_path, ns=(dest_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return True
+    return False
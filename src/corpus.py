@@ -0,0 +1,114 @@
+import os
+import random
+
+
+WORDS = (
+    "ring shire elf dwarf hobbit wizard mountain river forest road tower "
+    "song light shadow king steward horse sword bridge valley star ship "
+    "journey council fellowship lore ancient silver golden green grey white"
+).split()
+
+BLOCK_TYPES = ("paragraph", "heading", "ulist", "olist", "code", "quote")
+
+
+class CorpusShape:
+    def __init__(
+        self,
+        pages=100,
+        depth=2,
+        fanout=4,
+        blocks=20,
+        block_mix=None,
+        inline_density=0.1,
+        inline_mix=None,
+        seed=0,
+    ):
+        self.pages = pages
+        self.depth = depth
+        self.fanout = fanout
+        self.blocks = blocks
+        self.block_mix = block_mix or {
+            "paragraph": 6, "heading": 2, "ulist": 2, "olist": 1, "code": 1, "quote": 1,
+        }
+        self.inline_density = inline_density
+        self.inline_mix = inline_mix or {"bold": 3, "italic": 3, "code": 2, "link": 3, "image": 1}
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class CorpusGenerator:
+    def __init__(self, shape):
+        self.shape = shape
+        self.random = random.Random(shape.seed)
+
+    def words(self, count):
+        return [self.random.choice(WORDS) for _ in range(count)]
+
+    def inline_text(self, count):
+        kinds = list(self.shape.inline_mix)
+        weights = [self.shape.inline_mix[kind] for kind in kinds]
+        words = []
+        for word in self.words(count):
+            if self.random.random() < self.shape.inline_density:
+                kind = self.random.choices(kinds, weights)[0]
+                if kind == "bold":
+                    word = f"**{word}**"
+                elif kind == "italic":
+                    word = f"_{word}_"
+                elif kind == "code":
+                    word = f"`{word}`"
+                elif kind == "link":
+                    word = f"[{word}](/{self.random.choice(WORDS)})"
+                else:
+                    word = f"![{word}](/images/{self.random.choice(WORDS)}.png)"
+            words.append(word)
+        return " ".join(words)
+
+    def block(self, block_type):
+        lines = self.random.randint(1, 5)
+        if block_type == "heading":
+            return "#" * self.random.randint(2, 6) + " " + self.inline_text(4)
+        if block_type == "ulist":
+            return "\n".join(f"- {self.inline_text(8)}" for _ in range(lines))
+        if block_type == "olist":
+            return "\n".join(f"{i}. {self.inline_text(8)}" for i in range(1, lines + 1))
+        if block_type == "code":
+            body = "\n".join("    " + " ".join(self.words(6)) for _ in range(lines))
+            return f"```\n{body}\n```"
+        if block_type == "quote":
+            return "\n".join(f"> {self.inline_text(10)}" for _ in range(lines))
+        return "\n".join(self.inline_text(12) for _ in range(lines))
+
+    def page(self):
+        block_types = list(self.shape.block_mix)
+        weights = [self.shape.block_mix[block_type] for block_type in block_types]
+        blocks = ["# " + " ".join(self.words(4)).title()]
+        for block_type in self.random.choices(block_types, weights, k=self.shape.blocks):
+            blocks.append(self.block(block_type))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_path(self, index):
+        parts = []
+        remaining = index
+        for _ in range(self.shape.depth):
+            parts.append(f"section-{remaining % self.shape.fanout}")
+            remaining //= self.shape.fanout
+        parts.append(f"page-{index}")
+        return os.path.join(*parts, "index.md")
+
+    def pages(self):
+        return [(self.page_path(index), self.page()) for index in range(self.shape.pages)]
+
+
+def generate_corpus(shape):
+    return CorpusGenerator(shape).pages()
+
+
+def write_corpus(pages, dir_path):
+    for relative_path, markdown in pages:
+        path = os.path.join(dir_path, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
@@ -0,0 +1,111 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    # One JSON request per line, answered with one JSON line.
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": f"bad request: {e}"}
+            else:
+                if isinstance(request, dict):
+                    response = self.server.daemon.handle(request)
+                else:
+                    response = {"ok": False, "error": "bad request: expected a JSON object"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, daemon):
+        super().__init__(socket_path, DaemonRequestHandler)
+        self.daemon = daemon
+
+
+class BuildDaemon:
+    # Keeps a SiteWatcher, and with it the page index, manifest, compiled
+    # template and block cache, alive between builds. Each build request
+    # polls for changed files and rebuilds only what they affect, so a
+    # warm build skips interpreter startup and the walk over ./content.
+    def __init__(self, watcher, socket_path):
+        self.watcher = watcher
+        self.socket_path = socket_path
+        self.started = time.time()
+        self.builds = 0
+        self.server = None
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "build":
+            return self.build()
+        if command == "status":
+            return {
+                "ok": True,
+                "pages": len(self.watcher.page_sources),
+                "builds": self.builds,
+                "uptime_s": round(time.time() - self.started, 1),
+            }
+        if command == "stop":
+            # shutdown() waits for serve_forever, which is running this request.
+            threading.Thread(target=self.server.shutdown).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {command}"}
+
+    def build(self):
+        self.builds += 1
+        start = time.perf_counter()
+        changed = self.watcher.poll()
+        if not changed and self.watcher.last_error is None:
+            elapsed = (time.perf_counter() - start) * 1000
+            return {
+                "ok": True,
+                "changed": 0,
+                "rendered": 0,
+                "copied": 0,
+                "removed": 0,
+                "broken_links": 0,
+                "elapsed_ms": round(elapsed, 1),
+                "error": None,
+            }
+        # A failed rebuild is retried until it succeeds, changes or not.
+        summary = self.watcher.rebuild(changed)
+        summary["ok"] = summary["error"] is None
+        return summary
+
+    def serve(self):
+        remove_stale_socket(self.socket_path)
+        self.server = DaemonServer(self.socket_path, self)
+        print(f"Build daemon listening on {self.socket_path} (Ctrl+C to stop)...")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            os.remove(self.socket_path)
+            self.watcher.close()
+            print("Build daemon stopped.")
+
+
+def remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        directory = os.path.dirname(socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise Exception(f"a build daemon is already listening on {socket_path}")
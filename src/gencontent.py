@@ -1,39 +1,311 @@
+import asyncio
+import io
 import os
-from block_markdown import markdown_to_html_node
-from copystatic import copy_files_recursive
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from block_markdown import write_markdown_html
+from blockcache import get_block_cache
+from minify import Minifier
+from manifest import generator_hash, hash_file
+from profiling import stage_timer
+from rendercontext import RenderContext
+from shards import select_shard
+from template import load_template
+
+
+READ_CHUNK_SIZE = 1 << 16
+PIPELINE_IO_THREADS = 4
+
+_basepath_contexts = {}
 
 
 def extract_title(markdown):
-    blocks = markdown.splitlines()
-    for block in blocks:
-        if block.startswith("# "):
-            return block[2:].strip()
+    return find_title(markdown.splitlines())
+
+def find_title(lines):
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].strip()
     raise ValueError("No title found in markdown")
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def generate_page(from_path, template_path, dest_path, basepath, profiler=None, cache_path=None, context=None):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}...")
-    with open(from_path, "r") as f:
-        markdown_file = f.read()
-    with open(template_path, "r") as f:
-        template_file = f.read()
-    html_string = markdown_to_html_node(markdown_file).to_html()
-    page_title = extract_title(markdown_file)
-    updated_template = template_file.replace("{{ Content }}", html_string)
-    updated_template = updated_template.replace("{{ Title }}", page_title)
-    updated_template = updated_template.replace('href="/', f"href=\"{basepath}/")
-    updated_template = updated_template.replace('src="/', f"src=\"{basepath}/")
-    
-    with open(dest_path, "w") as f:
-        f.write(updated_template)
-    
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
+    start = time.perf_counter()
+    cache = None if cache_path is None else get_block_cache(cache_path)
+    cache_start = None if cache is None else (cache.hits, cache.misses)
+    context = page_context(context, basepath)
+    minifier = page_minifier(context)
+    with stage_timer(profiler, "load_template"):
+        template = load_template(template_path, basepath, context.assets, minifier is not None)
+    links = []
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path:
+        os.makedirs(dest_dir_path, exist_ok=True)
+
+    # Blocks are parsed and written one at a time, so memory stays flat
+    # however large the source is. The page goes to a temporary file and
+    # replaces the old output only once it is complete. With a profiler,
+    # write_markdown_html times each stage of this same path.
+    tmp_path = dest_path + ".tmp"
+    with open(from_path, "r") as source:
+        with stage_timer(profiler, "read"):
+            page_title = find_title(source)
+            source.seek(0)
+        chunks = iter(partial(source.read, READ_CHUNK_SIZE), "")
+        try:
+            with open(tmp_path, "w") as f:
+                template.write(f, {
+                    "Content": lambda sink: write_markdown_html(
+                        chunks, sink, cache, context, minifier, links, profiler,
+                    ),
+                    "Title": page_title if minifier is None else minifier.text(page_title),
+                })
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    with stage_timer(profiler, "write"):
+        os.replace(tmp_path, dest_path)
+    stats = finish_page(dest_path, template, cache, cache_start, minifier, links)
+    if profiler is not None:
+        profiler.add_page(
+            from_path, time.perf_counter() - start, os.path.getsize(from_path), os.path.getsize(dest_path),
+        )
+    return stats
+
+def page_context(context, basepath):
+    # Links and images are resolved against the basepath as their nodes
+    # are built, so every page renders with a context.
+    if context is not None:
+        return context
+    if basepath not in _basepath_contexts:
+        _basepath_contexts[basepath] = RenderContext(basepath)
+    return _basepath_contexts[basepath]
+
+def page_minifier(context):
+    if not context.minify:
+        return None
+    return Minifier()
+
+def finish_page(dest_path, template, cache, cache_start, minifier, links):
+    stats = {"links": {dest_path: links}}
+    if cache is not None:
+        cache.commit()
+        stats["hits"] = cache.hits - cache_start[0]
+        stats["misses"] = cache.misses - cache_start[1]
+    if minifier is not None:
+        saved = template.saved + minifier.saved
+        print(f" * minified {dest_path}: {saved} bytes saved")
+        stats["minified_pages"] = 1
+        stats["minified_bytes"] = saved
+    return stats
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path) and filename.endswith(".md"):
-            dest_path = dest_path[:-3] + ".html"
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, dest_path[:-3] + ".html"))
         elif os.path.isdir(from_path):
-            if not os.path.exists(dest_path):
-                os.mkdir(dest_path)
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
+
+def render_page(markdown, template_path, dest_path, basepath, cache_path=None, context=None):
+    # In-memory counterpart of generate_page for the pipelined build:
+    # returns the finished page instead of writing it.
+    cache = None if cache_path is None else get_block_cache(cache_path)
+    cache_start = None if cache is None else (cache.hits, cache.misses)
+    context = page_context(context, basepath)
+    minifier = page_minifier(context)
+    template = load_template(template_path, basepath, context.assets, minifier is not None)
+    page_title = find_title(markdown.split("\n"))
+    links = []
+    page = io.StringIO()
+    template.write(page, {
+        "Content": lambda sink: write_markdown_html(
+            [markdown], sink, cache, context, minifier, links,
+        ),
+        "Title": page_title if minifier is None else minifier.text(page_title),
+    })
+    return page.getvalue(), finish_page(dest_path, template, cache, cache_start, minifier, links)
+
+def read_source(from_path):
+    with open(from_path, "r") as f:
+        return f.read()
+
+def write_output(dest_path, page):
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path:
+        os.makedirs(dest_dir_path, exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(page)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, dest_path)
+
+async def pipeline_pages(tasks, jobs, depth, cache_path, page_stats, context=None):
+    # Three overlapping stages: sources are read ahead on a thread pool
+    # in traversal order, parsed and rendered (in worker processes when
+    # jobs > 1), then written back on the same thread pool. The bounded
+    # queues apply backpressure, so at most a few times `depth` pages are
+    # held in memory at once.
+    loop = asyncio.get_running_loop()
+    parsed = asyncio.Queue(depth)
+    rendered = asyncio.Queue(depth)
+    renderers = max(jobs, 1)
+    errors = {}
+
+    async def read_sources():
+        pending = deque()
+        for index, task in enumerate(tasks):
+            pending.append((index, task, loop.run_in_executor(io_pool, read_source, task[0])))
+            if len(pending) >= depth:
+                await parsed.put(await next_source(pending))
+        while pending:
+            await parsed.put(await next_source(pending))
+        for _ in range(renderers):
+            await parsed.put(None)
+
+    async def next_source(pending):
+        index, task, future = pending.popleft()
+        try:
+            return index, task, await future
+        except Exception as e:
+            errors[index] = e
+            return index, task, None
+
+    async def render_sources():
+        while (item := await parsed.get()) is not None:
+            index, task, markdown = item
+            if markdown is None:
+                continue
+            from_path, template_path, dest_path, basepath = task
+            print(f"Generating page from {from_path} to {dest_path} using {template_path}...")
+            try:
+                if cpu_pool is None:
+                    page, stats = render_page(markdown, template_path, dest_path, basepath, cache_path, context)
+                else:
+                    page, stats = await loop.run_in_executor(
+                        cpu_pool, render_page, markdown, template_path, dest_path, basepath, cache_path, context,
+                    )
+            except Exception as e:
+                errors[index] = e
+                continue
+            add_page_stats(page_stats, stats)
+            await rendered.put((index, dest_path, page))
+
+    async def write_outputs():
+        while (item := await rendered.get()) is not None:
+            index, dest_path, page = item
+            try:
+                await loop.run_in_executor(io_pool, write_output, dest_path, page)
+            except Exception as e:
+                errors[index] = e
+
+    with ThreadPoolExecutor(PIPELINE_IO_THREADS) as io_pool, \
+            (ProcessPoolExecutor(jobs) if jobs > 1 else nullcontext()) as cpu_pool:
+        writers = [asyncio.create_task(write_outputs()) for _ in range(PIPELINE_IO_THREADS)]
+        await asyncio.gather(read_sources(), *(render_sources() for _ in range(renderers)))
+        for _ in writers:
+            await rendered.put(None)
+        await asyncio.gather(*writers)
+    return [(tasks[index][0], errors[index]) for index in sorted(errors)]
+
+def render_pages(tasks, jobs=1, profiler=None, cache_path=None, page_stats=None, pipeline=0, context=None):
+    if pipeline > 0 and profiler is None and tasks:
+        return asyncio.run(pipeline_pages(tasks, min(jobs, len(tasks)), pipeline, cache_path, page_stats, context))
+    errors = []
+    if profiler is not None or jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                stats = generate_page(*task, profiler, cache_path, context)
+            except Exception as e:
+                errors.append((task[0], e))
+                continue
+            add_page_stats(page_stats, stats)
+        return errors
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        futures = [executor.submit(generate_page, *task, None, cache_path, context) for task in tasks]
+        for task, future in zip(tasks, futures):
+            error = future.exception()
+            if error is not None:
+                errors.append((task[0], error))
+            else:
+                add_page_stats(page_stats, future.result())
+    return errors
+
+def add_page_stats(page_stats, stats):
+    if page_stats is None:
+        return
+    for name, count in stats.items():
+        if name == "links":
+            page_stats.setdefault("links", {}).update(count)
+        else:
+            page_stats[name] = page_stats.get(name, 0) + count
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, profiler=None, cache_path=None, page_stats=None, pipeline=0, context=None, shard=None):
+    with stage_timer(profiler, "walk"):
+        pages = collect_pages(dir_path_content, dest_dir_path)
+        if shard is not None:
+            pages = select_shard(pages, dir_path_content, shard)
+    generate_pages(
+        pages, template_path, basepath, manifest, jobs,
+        profiler=profiler, cache_path=cache_path, page_stats=page_stats, pipeline=pipeline, context=context,
+    )
+
+def page_build_inputs(template_path, basepath, context=None):
+    inputs = {
+        "template": hash_file(template_path),
+        "basepath": basepath,
+        "generator": generator_hash(),
+    }
+    if context is not None:
+        inputs["context"] = context.fingerprint()
+    return inputs
+
+def generate_pages(pages, template_path, basepath, manifest=None, jobs=1, build_inputs=None, profiler=None, cache_path=None, page_stats=None, pipeline=0, context=None):
+    if manifest is None:
+        tasks = [(from_path, template_path, dest_path, basepath) for from_path, dest_path in pages]
+        raise_errors(render_pages(tasks, jobs, profiler, cache_path, page_stats, pipeline, context))
+        return
+
+    tasks = []
+    stale = []
+    with stage_timer(profiler, "hash"):
+        if build_inputs is None:
+            build_inputs = page_build_inputs(template_path, basepath, context)
+        for from_path, dest_path in pages:
+            inputs = dict(build_inputs, source=hash_file(from_path))
+            if manifest.is_fresh(dest_path, inputs):
+                manifest.skipped += 1
+                continue
+            tasks.append((from_path, template_path, dest_path, basepath))
+            stale.append((from_path, dest_path, inputs))
+
+    if page_stats is None:
+        page_stats = {}
+    errors = render_pages(tasks, jobs, profiler, cache_path, page_stats, pipeline, context)
+    links = page_stats.pop("links", {})
+    failed = {from_path for from_path, _ in errors}
+    for from_path, dest_path, inputs in stale:
+        if from_path in failed:
+            continue
+        # Kept with the page so skipped pages can still be link checked.
+        manifest.record(dest_path, from_path, inputs, links=links.get(dest_path, []))
+        manifest.rendered += 1
+    raise_errors(errors)
+
+def raise_errors(errors):
+    if not errors:
+        return
+    details = "\n".join(f"  {from_path}: {error}" for from_path, error in errors)
+    raise Exception(f"failed to generate {len(errors)} page(s):\n{details}")
@@ -1,16 +1,39 @@
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+))
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children: list = None, props: dict = None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minifier=None):
+        raise NotImplementedError("to_html method not implemented")
+
+    def write_html(self, sink, minifier=None):
+        if minifier is None:
+            self._emit_html(sink.write)
+        else:
+            self._emit_minified(sink.write, minifier)
+
+    # The plain and minified serializers are kept apart so the plain one
+    # does no per-node minifier checks.
+    def _emit_html(self, write):
+        raise NotImplementedError("to_html method not implemented")
+
+    def _emit_minified(self, write, minifier):
         raise NotImplementedError("to_html method not implemented")
     
-    def props_to_html(self):
+    def props_to_html(self, minifier=None):
         if not self.props:
             return ""
+        if minifier is not None:
+            return minifier.props(self.props)
         props_str = " ".join(f'{key}="{value}"' for key, value in self.props.items())
         return " " + props_str
     
@@ -18,32 +41,83 @@ class HTMLNode:
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props: dict = None):
         super().__init__(tag, value, None, props)
     
-    def to_html(self):
+    def to_html(self, minifier=None):
         if self.value is None:
             raise ValueError("invalid HTML: no value")
+        if minifier is not None:
+            return self._minified_html(minifier)
         if self.tag is None:
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def _minified_html(self, minifier):
+        if self.tag is None:
+            return minifier.text(self.value)
+        if self.tag in VOID_TAGS and self.value == "":
+            minifier.saved += len(self.tag) + 3
+            return f"<{self.tag}{self.props_to_html(minifier)}>"
+        value = self.value if self.tag == "code" else minifier.text(self.value)
+        return f"<{self.tag}{self.props_to_html(minifier)}>{value}</{self.tag}>"
+
+    def _emit_html(self, write):
+        if self.value is None:
+            raise ValueError("invalid HTML: no value")
+        if self.tag is None:
+            write(self.value)
+        else:
+            write(f"<{self.tag}{self.props_to_html() if self.props else ''}>{self.value}</{self.tag}>")
+
+    def _emit_minified(self, write, minifier):
+        if self.value is None:
+            raise ValueError("invalid HTML: no value")
+        write(self._minified_html(minifier))
     
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children: list, props: dict = None):
         super().__init__(tag, None, children, props)
     
-    def to_html(self):
+    def to_html(self, minifier=None):
+        parts = []
+        if minifier is None:
+            self._emit_html(parts.append)
+        else:
+            self._emit_minified(parts.append, minifier)
+        return "".join(parts)
+
+    def _emit_html(self, write):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        write(f"<{self.tag}{self.props_to_html() if self.props else ''}>")
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child._emit_html(write)
+        write(f"</{self.tag}>")
+
+    def _emit_minified(self, write, minifier):
+        if self.tag is None:
+            raise ValueError("invalid HTML: no tag")
+        if self.children is None:
+            raise ValueError("invalid HTML: no children")
+        write(f"<{self.tag}{self.props_to_html(minifier)}>")
+        if self.tag == "pre":
+            # Preformatted content is emitted exactly as written.
+            for child in self.children:
+                child._emit_html(write)
+        else:
+            for child in self.children:
+                child._emit_minified(write, minifier)
+        write(f"</{self.tag}>")
     
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import fingerprinted_name, site_url
+from copystatic import is_up_to_date
+from manifest import hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+VARIANT_WIDTHS = (480, 960, 1440)
+INDEX_VERSION = 1
+
+
+def read_image_size(path):
+    # Reads (width, height) from the file header without decoding the
+    # image. Returns None for unknown or truncated files.
+    try:
+        with open(path, "rb") as f:
+            head = f.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return webp_size(head)
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                return jpeg_size(f)
+    except struct.error:
+        return None
+    return None
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        (bits,) = struct.unpack("<I", head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    return None
+
+def jpeg_size(f):
+    # Walks the segment headers up to the first start-of-frame marker.
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:
+            fill = f.read(1)
+            if not fill:
+                return None
+            code = fill[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def variant_widths(width):
+    if Image is None:
+        return []
+    return [variant for variant in VARIANT_WIDTHS if variant < width]
+
+def variant_name(path, width):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{width}w{ext}"
+
+def resize_image(source_path, dest_path, width):
+    with Image.open(source_path) as image:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        tmp_path = dest_path + ".tmp"
+        resized.save(tmp_path, format=image.format, optimize=True)
+    os.replace(tmp_path, dest_path)
+
+
+def load_index(index_path):
+    try:
+        with open(index_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("images", {})
+
+def save_index(index_path, index):
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": INDEX_VERSION, "images": index}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def collect_images(dir_path):
+    images = []
+    for entry in sorted(os.scandir(dir_path), key=lambda entry: entry.name):
+        if entry.is_dir():
+            images.extend(collect_images(entry.path))
+        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(entry.path)
+    return images
+
+
+def build_image_catalog(static_dir, output_dir, cache_dir, manifest=None, jobs=1, assets=None):
+    # Returns a map from site URL ("/images/a.png") to the image's size
+    # and its responsive variants. Dimensions are remembered per source
+    # path until its size or mtime changes, and resized variants live in
+    # cache_dir named by the source hash, so no image is processed twice.
+    # With an asset map, variants are published under fingerprinted names.
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    old_index = load_index(index_path)
+    index = {}
+    catalog = {}
+    resizes = []
+    copies = []
+    for source_path in collect_images(static_dir):
+        rel_path = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+        source_stat = os.stat(source_path)
+        entry = old_index.get(rel_path)
+        if entry is None or entry["size"] != source_stat.st_size or entry["mtime"] != source_stat.st_mtime_ns:
+            size = read_image_size(source_path)
+            if size is None:
+                continue
+            entry = {
+                "size": source_stat.st_size,
+                "mtime": source_stat.st_mtime_ns,
+                "hash": hash_file(source_path),
+                "width": size[0],
+                "height": size[1],
+            }
+        index[rel_path] = entry
+
+        url = site_url(rel_path)
+        ext = os.path.splitext(source_path)[1].lower()
+        variants = []
+        for width in variant_widths(entry["width"]):
+            cached_path = os.path.join(cache_dir, f"{entry['hash']}-{width}{ext}")
+            if not os.path.exists(cached_path):
+                resizes.append((source_path, cached_path, width))
+            variant_path = variant_name(rel_path, width)
+            if assets is not None:
+                # The cached name already identifies the variant's content.
+                digest = hashlib.sha256(os.path.basename(cached_path).encode()).hexdigest()
+                assets.add(site_url(variant_path), site_url(fingerprinted_name(variant_path, digest)))
+                variant_path = fingerprinted_name(variant_path, digest)
+            copies.append((cached_path, os.path.join(output_dir, variant_path)))
+            variants.append([variant_name(url, width), width])
+        variants.append([url, entry["width"]])
+        catalog[url] = {"width": entry["width"], "height": entry["height"], "variants": variants}
+
+    if jobs > 1 and len(resizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(resizes))) as executor:
+            list(executor.map(resize_image, *zip(*resizes)))
+    else:
+        for source_path, cached_path, width in resizes:
+            resize_image(source_path, cached_path, width)
+
+    for cached_path, dest_path in copies:
+        cached_stat = os.stat(cached_path)
+        if not is_up_to_date(cached_path, cached_stat, dest_path, False):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(cached_path, dest_path)
+        if manifest is not None:
+            inputs = {"size": cached_stat.st_size, "mtime": cached_stat.st_mtime_ns}
+            manifest.record(dest_path, cached_path, inputs, "image")
+    if manifest is not None:
+        manifest.remove_orphans("image")
+    save_index(index_path, index)
+    return catalog, len(resizes)
@@ -2,6 +2,13 @@ import re
 from textnode import TextNode, TextType
 
 
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# In order of precedence: text inside a bold span is never split on "_".
+DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for node in old_nodes:
@@ -27,78 +34,152 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_RE.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_RE.findall(text)
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
+    return split_nodes_pattern(
+        old_nodes, IMAGE_RE, TextType.IMAGE, has_unclosed_image,
+        "invalid markdown, image section not closed",
+    )
 
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            if "![" in original_text:
-                raise ValueError("invalid markdown, image section not closed")
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            alt, url = image
-            sections = original_text.split(f"![{alt}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
 
-    return new_nodes
+def split_nodes_link(old_nodes):
+    return split_nodes_pattern(
+        old_nodes, LINK_RE, TextType.LINK, has_unclosed_link,
+        "invalid markdown, link section not closed",
+    )
 
 
-def split_nodes_link(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type, has_unclosed, error):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
 
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
-            if "[" in original_text and "](" in original_text:
-                raise ValueError("invalid markdown, link section not closed")
+        text = old_node.text
+        last = 0
+        for match in pattern.finditer(text):
+            if match.start() > last:
+                new_nodes.append(TextNode(text[last:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            last = match.end()
+        if last == 0:
+            if has_unclosed(text, 0, len(text)):
+                raise ValueError(error)
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            text, url = link
-            sections = original_text.split(f"[{text}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.LINK, url))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif last < len(text):
+            new_nodes.append(TextNode(text[last:], TextType.TEXT))
 
     return new_nodes
 
+
+def has_unclosed_image(text, start, end):
+    return text.find("![", start, end) != -1
+
+
+def has_unclosed_link(text, start, end):
+    return text.find("[", start, end) != -1 and text.find("](", start, end) != -1
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
\ No newline at end of file
+    # Each span is split in one step and the pieces are emitted straight
+    # into the result, instead of rebuilding the node list once per
+    # delimiter, image and link pass. The output, and which error is
+    # raised first, match the pass-by-pass pipeline.
+    if text == "":
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    errors = set()
+    split_text(text, 0, nodes, errors)
+    if "image" in errors:
+        raise ValueError("invalid markdown, image section not closed")
+    if "link" in errors:
+        raise ValueError("invalid markdown, link section not closed")
+    return nodes
+
+
+def split_text(text, level, nodes, errors):
+    while level < len(DELIMITERS):
+        delimiter, text_type = DELIMITERS[level]
+        if delimiter in text:
+            break
+        level += 1
+    else:
+        split_media(text, nodes, errors)
+        return
+
+    parts = text.split(delimiter)
+    if len(parts) % 2 == 0:
+        raise Exception("invalid markdown, unmatched delimiter")
+    for i, part in enumerate(parts):
+        if part == "":
+            continue
+        if i % 2 == 0:
+            split_text(part, level + 1, nodes, errors)
+        else:
+            nodes.append(TextNode(part, text_type))
+
+
+def media_targets(text, offset=0):
+    # (url, offset) for each link and image target text_to_textnodes
+    # would produce, without building the nodes: text inside bold, italic
+    # and code spans stays literal, so targets there are not collected.
+    targets = []
+    collect_media_targets(text, offset, 0, targets)
+    return targets
+
+
+def collect_media_targets(text, offset, level, targets):
+    while level < len(DELIMITERS):
+        delimiter = DELIMITERS[level][0]
+        if delimiter in text:
+            break
+        level += 1
+    else:
+        for pattern in (LINK_RE, IMAGE_RE):
+            for match in pattern.finditer(text):
+                targets.append((match.group(2), offset + match.start(2)))
+        return
+
+    parts = text.split(delimiter)
+    if len(parts) % 2 == 0:
+        # Rendering raises for this span, so the page fails anyway.
+        return
+    for i, part in enumerate(parts):
+        if i % 2 == 0 and part != "":
+            collect_media_targets(part, offset, level + 1, targets)
+        offset += len(part) + len(delimiter)
+
+
+def split_media(text, nodes, errors):
+    if "[" not in text:
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    piece_start = 0
+    has_image = False
+    for match in IMAGE_RE.finditer(text):
+        split_links(text, piece_start, match.start(), nodes, errors)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        has_image = True
+        piece_start = match.end()
+    split_links(text, piece_start, len(text), nodes, errors)
+    if not has_image and has_unclosed_image(text, 0, len(text)):
+        errors.add("image")
+
+
+def split_links(text, start, end, nodes, errors):
+    last = start
+    for match in LINK_RE.finditer(text, start, end):
+        if match.start() > last:
+            nodes.append(TextNode(text[last:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        last = match.end()
+    if last == start and has_unclosed_link(text, start, end):
+        errors.add("link")
+    if last < end:
+        nodes.append(TextNode(text[last:end], TextType.TEXT))
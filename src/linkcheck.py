@@ -0,0 +1,72 @@
+import os
+from urllib.parse import unquote, urljoin
+
+from template import URL_SUFFIX_RE
+
+
+TARGET_KINDS = ("page", "static", "image", "search", "listing")
+
+
+def site_targets(manifest, output_dir, assets=None):
+    # Every URL the build publishes, from the manifest alone.
+    targets = set()
+    for dest_path, entry in manifest.entries.items():
+        if entry.get("kind", "page") in TARGET_KINDS:
+            targets.update(output_urls(dest_path, output_dir))
+    if assets is not None:
+        # Fingerprinted assets are linked by their plain names.
+        targets.update(url for url, fingerprinted in assets.urls.items() if fingerprinted in targets)
+    return targets
+
+def output_urls(dest_path, output_dir):
+    # Pages are also reachable by their directory ("/blog/tom/" and "/blog/tom").
+    url = "/" + os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return (url, url[:-len("index.html")], url[:-len("/index.html")] or "/")
+    return (url,)
+
+def check_links(manifest, output_dir, assets=None):
+    # Resolves the links recorded for each page while it rendered, so the
+    # cost is one set lookup per link. Returns (source, offset, url) for
+    # every target that is not part of the site.
+    targets = site_targets(manifest, output_dir, assets)
+    broken = []
+    checked = 0
+    for dest_path, entry in manifest.entries.items():
+        checked += len(entry.get("links", ()))
+        broken.extend(broken_links(dest_path, entry, output_dir, targets))
+    broken.sort()
+    return checked, broken
+
+def broken_links(dest_path, entry, output_dir, targets):
+    # The links of one manifest entry that miss `targets`. Relative links
+    # are resolved against the page's own URL.
+    broken = []
+    page_url = None
+    for url, offset in entry.get("links", ()):
+        target = url
+        if not url.startswith("/"):
+            if page_url is None:
+                page_url = "/" + os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+            target = urljoin(page_url, url)
+        match = URL_SUFFIX_RE.search(target)
+        path = target if match is None else target[:match.start()]
+        if path not in targets and unquote(path) not in targets:
+            broken.append((entry["source"], offset, url))
+    return broken
+
+
+def line_column(path, offset):
+    try:
+        with open(path, "r") as f:
+            before = f.read(offset)
+    except OSError:
+        return None
+    line = before.count("\n") + 1
+    return line, offset - (before.rfind("\n") + 1) + 1
+
+def format_broken_link(source, offset, url):
+    position = line_column(source, offset)
+    if position is None:
+        return f"{source}: character {offset}: broken link to {url}"
+    return f"{source}:{position[0]}:{position[1]}: broken link to {url}"
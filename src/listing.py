@@ -0,0 +1,196 @@
+import hashlib
+import html
+import json
+import os
+import re
+from datetime import date
+
+from block_markdown import BlockType, iter_block_spans, parse_block
+from gencontent import collect_pages, extract_title, page_build_inputs, page_context, page_minifier, write_output
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from manifest import hash_file
+from template import load_template
+from textnode import TextType
+
+
+CACHE_VERSION = 2
+EXCERPT_LENGTH = 200
+DATE_PREFIX_RE = re.compile(r"(\d{4}-\d{2}-\d{2})(?![0-9])")
+DATE_LINE_RE = re.compile(r"Date: (\d{4}-\d{2}-\d{2})")
+
+
+def post_excerpt(markdown, length=EXCERPT_LENGTH):
+    # Plain text of the first paragraph with prose in it (not just links
+    # such as "[< Back Home](/)"), cut at a word boundary.
+    for text, start, end in iter_block_spans([markdown]):
+        block = parse_block(text, start)
+        if block.block_type != BlockType.PARAGRAPH or DATE_LINE_RE.fullmatch(block.text):
+            continue
+        nodes = [node for node in text_to_textnodes(block.content) if node.text_type != TextType.IMAGE]
+        if not any(node.text_type != TextType.LINK and any(c.isalnum() for c in node.text) for node in nodes):
+            continue
+        excerpt = " ".join("".join(node.text for node in nodes).split())
+        if len(excerpt) <= length:
+            return excerpt
+        return excerpt[:length].rsplit(" ", 1)[0].rstrip(",.;:") + "…"
+    return ""
+
+def markdown_date(markdown):
+    # The ISO date of a "Date: YYYY-MM-DD" paragraph, if the post has one.
+    for text, start, end in iter_block_spans([markdown]):
+        match = DATE_LINE_RE.fullmatch(text)
+        if match is not None and parse_date(match.group(1)) is not None:
+            return match.group(1)
+    return None
+
+def parse_date(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return None
+
+def post_date(from_path, content_dir, dated=None):
+    # When the post was published: its "Date: YYYY-MM-DD" line (`dated`,
+    # from markdown_date), or else the date its slug starts with
+    # ("2024-05-01-tom/index.md" or "2024-05-01-tom.md"). None for
+    # undated posts; modification times are never used, so the order
+    # does not change with a touch or a fresh checkout.
+    if dated is not None:
+        return parse_date(dated)
+    slug = os.path.relpath(from_path, content_dir).split(os.sep)[0]
+    match = DATE_PREFIX_RE.match(slug)
+    return None if match is None else parse_date(match.group(1))
+
+def post_sort_key(published, url):
+    # Newest first, then undated posts; ties keep their path order.
+    if published is None:
+        return (1, 0, url)
+    return (0, -published.toordinal(), url)
+
+def listing_page_path(output_dir, number):
+    if number == 1:
+        return os.path.join(output_dir, "index.html")
+    return os.path.join(output_dir, "page", str(number), "index.html")
+
+def listing_page_url(listing_url, number):
+    return listing_url if number == 1 else f"{listing_url}page/{number}/"
+
+def post_url(dest_path, output_dir):
+    relative = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    if relative == "index.html" or relative.endswith("/index.html"):
+        relative = relative[:-len("index.html")]
+    return "/" + relative
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("posts", {})
+
+def save_cache(cache_path, posts):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": CACHE_VERSION, "posts": posts}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def listing_to_html_node(title, items, newer_url, older_url, context):
+    # Titles and excerpts are plain text, so they are escaped here.
+    children = [ParentNode("h1", [LeafNode(None, html.escape(title, quote=False))])]
+    for url, post_title, excerpt in items:
+        link = LeafNode("a", html.escape(post_title, quote=False), {"href": context.site_url(url)})
+        article = [ParentNode("h2", [link])]
+        if excerpt:
+            article.append(ParentNode("p", [LeafNode(None, html.escape(excerpt, quote=False))]))
+        children.append(ParentNode("article", article))
+    nav = []
+    if newer_url is not None:
+        nav.append(LeafNode("a", "Newer posts", {"href": context.site_url(newer_url), "rel": "prev"}))
+    if older_url is not None:
+        nav.append(LeafNode("a", "Older posts", {"href": context.site_url(older_url), "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return ParentNode("div", children)
+
+
+def build_listings(listing_dirs, dir_path_content, output_dir, template_path, basepath, page_size, cache_path, manifest, context=None, build_inputs=None):
+    # Writes paginated index pages for the posts below each listing
+    # directory, newest first by post_date: /blog/, /blog/page/2/, ...
+    # Titles and excerpts are cached by source hash, and each listing page
+    # is skipped while the posts it shows, its neighbours and the template
+    # are unchanged, so adding a post only re-renders the pages it shifts.
+    old_posts = load_cache(cache_path)
+    posts_cache = {}
+    context = page_context(context, basepath)
+    if build_inputs is None:
+        build_inputs = page_build_inputs(template_path, basepath, context)
+    minifier = page_minifier(context)
+    template = load_template(template_path, basepath, context.assets, minifier is not None)
+    stats = {"listings": 0, "posts": 0, "parsed": 0, "pages": 0, "rendered": 0, "skipped": 0}
+    for listing_dir in listing_dirs:
+        listing_dir = listing_dir.strip("/")
+        content_dir = os.path.join(dir_path_content, listing_dir)
+        listing_output_dir = os.path.join(output_dir, listing_dir)
+        if os.path.exists(os.path.join(content_dir, "index.md")):
+            raise Exception(f"{content_dir} has its own index.md; remove it to generate the listing")
+        posts = []
+        for from_path, dest_path in collect_pages(content_dir, listing_output_dir):
+            entry = manifest.entries.get(dest_path)
+            if entry is not None and "source" in entry["inputs"]:
+                source_hash = entry["inputs"]["source"]
+            else:
+                source_hash = hash_file(from_path)
+            post = old_posts.get(from_path)
+            if post is None or post["source"] != source_hash:
+                with open(from_path, "r") as f:
+                    markdown = f.read()
+                post = {
+                    "source": source_hash,
+                    "title": extract_title(markdown),
+                    "excerpt": post_excerpt(markdown),
+                    "date": markdown_date(markdown),
+                }
+                stats["parsed"] += 1
+            posts_cache[from_path] = post
+            url = post_url(dest_path, output_dir)
+            published = post_date(from_path, content_dir, post["date"])
+            posts.append((post_sort_key(published, url), url, post["title"], post["excerpt"]))
+        posts = [item[1:] for item in sorted(posts)]
+
+        listing_url = "/" + listing_dir + "/"
+        name = listing_dir.rsplit("/", 1)[-1].replace("-", " ").replace("_", " ").capitalize()
+        page_count = max(1, -(-len(posts) // page_size))
+        for number in range(1, page_count + 1):
+            items = posts[(number - 1) * page_size:number * page_size]
+            newer_url = listing_page_url(listing_url, number - 1) if number > 1 else None
+            older_url = listing_page_url(listing_url, number + 1) if number < page_count else None
+            title = name if number == 1 else f"{name} - page {number}"
+            dest_path = listing_page_path(listing_output_dir, number)
+            data = json.dumps([title, items, newer_url, older_url], sort_keys=True)
+            inputs = dict(build_inputs, listing=hashlib.sha256(data.encode()).hexdigest())
+            stats["pages"] += 1
+            if manifest.is_fresh(dest_path, inputs):
+                stats["skipped"] += 1
+                continue
+            node = listing_to_html_node(title, items, newer_url, older_url, context)
+            page_title = html.escape(title, quote=False)
+            write_output(dest_path, template.render({
+                "Title": page_title if minifier is None else minifier.text(page_title),
+                "Content": node.to_html(minifier),
+            }))
+            manifest.record(dest_path, content_dir, inputs, "listing")
+            stats["rendered"] += 1
+        stats["listings"] += 1
+        stats["posts"] += len(posts)
+    manifest.remove_orphans("listing")
+    save_cache(cache_path, posts_cache)
+    return stats
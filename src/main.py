@@ -1,32 +1,261 @@
+import argparse
 import os
-import shutil
 import sys
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
+from build import (
+    block_cache_path,
+    build_site,
+    dir_path_content,
+    dir_path_public,
+    dir_path_static,
+    image_cache_dir,
+    listing_cache_path,
+    search_cache_path,
+    template_path,
+)
+from buildclient import DEFAULT_SOCKET_PATH
+from daemon import BuildDaemon
+from profiling import BuildProfiler
+from rendercontext import RenderContext
+from server import PreviewSite, serve
+from shards import parse_shard
+from watch import SiteWatcher
 
 
-dir_path_static = "./static"
-dir_path_public = "./docs"
-dir_path_content = "./content"
-template_path = "./template.html"
+COMMANDS = ("build", "watch", "serve", "daemon", "merge")
 
-def main():
-    basepath = sys.argv[1] or "/"
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
-    print("Generating content pages...")
-    generate_pages_recursive(
-        dir_path_content,
-        template_path,
-        dir_path_public,
-        basepath
+def parse_args(argv):
+    command = "build"
+    if argv and argv[0] in COMMANDS:
+        command, argv = argv[0], argv[1:]
+    parser = argparse.ArgumentParser(
+        prog=f"main.py {command}",
+        description="Generate the static site.",
+    )
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete the public directory and rebuild every page",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static files by content hash when their mtimes differ",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes used to render pages (default: CPU count)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        type=int,
+        default=0,
+        metavar="DEPTH",
+        help="overlap reading, rendering and writing pages, keeping up to DEPTH "
+        "pages queued between stages; 0 renders each page in turn (default: 0)",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz (and .br when brotli is installed) copies of pages and static files",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=1024,
+        metavar="BYTES",
+        help="skip compressing outputs smaller than BYTES (default: 1024)",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add dimensions, lazy loading and (with Pillow) resized srcset variants to images",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish CSS, JS, image and font files as name.<hash>.ext and rewrite references to them",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify page HTML while rendering and report the bytes saved",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a client-side search index, sharded by term prefix, to search/ in the output",
+    )
+    parser.add_argument(
+        "--listing",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="generate paginated index pages for the posts under content/DIR, newest first (repeatable); "
+        "a post is dated by a 'Date: YYYY-MM-DD' line or else a YYYY-MM-DD prefix on its slug, e.g. "
+        "2024-05-01-tom/; undated posts follow in path order",
+    )
+    parser.add_argument(
+        "--listing-page-size",
+        type=int,
+        default=10,
+        metavar="N",
+        help="posts per listing page (default: 10)",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="size limit of the rendered block cache; 0 disables it (default: 256)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage and report the slowest pages (renders serially)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to report (default: 10)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="PATH",
+        help="also write cProfile stats for the build to PATH",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="also record peak memory with tracemalloc",
+    )
+    if command == "watch":
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.1,
+            help="seconds between polls for changes (default: 0.1)",
+        )
+        parser.add_argument(
+            "--debounce",
+            type=float,
+            default=0.05,
+            help="quiet period before a burst of changes is rebuilt (default: 0.05)",
+        )
+    if command == "build":
+        parser.add_argument(
+            "--shard",
+            type=shard_arg,
+            metavar="I/N",
+            help="render only the pages assigned to shard I of N (numbered from 1) into a partial "
+            "manifest; combine the shards with `main.py merge --shards N`",
+        )
+    if command == "merge":
+        parser.add_argument(
+            "--shards",
+            type=int,
+            required=True,
+            metavar="N",
+            help="number of shards to validate and merge",
+        )
+    if command == "daemon":
+        parser.add_argument(
+            "--socket",
+            default=DEFAULT_SOCKET_PATH,
+            help=f"Unix socket to accept build requests on (default: {DEFAULT_SOCKET_PATH})",
+        )
+    if command == "serve":
+        parser.add_argument(
+            "--host",
+            default="127.0.0.1",
+            help="address to listen on (default: 127.0.0.1)",
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=8888,
+            help="port to listen on (default: 8888)",
+        )
+    args = parser.parse_args(argv)
+    if args.listing_page_size < 1:
+        parser.error("--listing-page-size must be at least 1")
+    if getattr(args, "shard", None) is not None or command == "merge":
+        # Fingerprints and image variants would be computed once per shard.
+        for flag in ("images", "fingerprint"):
+            if getattr(args, flag):
+                parser.error(f"--{flag} is not supported with sharded builds")
+        if args.clean:
+            parser.error("--clean would delete the shards' pages; clean before starting the shards")
+    args.command = command
+    args.basepath = args.basepath or "/"
+    return args
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.command == "serve":
+        # Pages are rendered from the content directory on request; nothing is built.
+        context = RenderContext(args.basepath, minify=True) if args.minify else None
+        site = PreviewSite(dir_path_content, dir_path_static, template_path, args.basepath, context)
+        serve(site, args.host, args.port)
+        return
+    profiler = None
+    if args.profile or args.profile_dump or args.profile_memory:
+        profiler = BuildProfiler(args.profile_top, args.profile_dump, args.profile_memory)
+    block_cache_size = args.block_cache_size * 1024 * 1024
+    compress_min_size = args.compress_min_size if args.compress else None
+    manifest, context = build_site(
+        args.basepath,
+        clean=args.clean,
+        hash_static=args.hash_static,
+        jobs=args.jobs,
+        profiler=profiler,
+        block_cache_size=block_cache_size,
+        pipeline=args.pipeline,
+        compress_min_size=compress_min_size,
+        images=args.images,
+        fingerprint=args.fingerprint,
+        minify=args.minify,
+        search=args.search,
+        shard=getattr(args, "shard", None),
+        merge_shards=getattr(args, "shards", None),
+        listing_dirs=args.listing,
+        listing_page_size=args.listing_page_size,
     )
-    print("Site generation complete.")
+    if args.command in ("watch", "daemon"):
+        watcher = SiteWatcher(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            dir_path_public,
+            args.basepath,
+            manifest,
+            hash_static=args.hash_static,
+            cache_path=block_cache_path if block_cache_size else None,
+            compress_min_size=compress_min_size,
+            context=context,
+            image_cache_dir=image_cache_dir,
+            search_cache_path=search_cache_path if args.search else None,
+            listing_dirs=args.listing,
+            listing_page_size=args.listing_page_size,
+            listing_cache_path=listing_cache_path,
+        )
+        if args.command == "daemon":
+            BuildDaemon(watcher, args.socket).serve()
+        else:
+            watcher.run(args.interval, args.debounce)
 
 
-main()
+if __name__ == "__main__":
+    main()
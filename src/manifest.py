@@ -0,0 +1,186 @@
+import ast
+import hashlib
+import json
+import os
+
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Modules whose outputs record the generator hash; it covers them and
+# everything they import from src/, but not the CLI, watcher, daemon,
+# preview server or benchmarks.
+RENDER_MODULES = ("gencontent", "listing")
+
+
+def generator_modules(src_dir=None):
+    if src_dir is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+    modules = set()
+    pending = list(RENDER_MODULES)
+    while pending:
+        name = pending.pop()
+        path = os.path.join(src_dir, name + ".py")
+        if name in modules or not os.path.exists(path):
+            continue
+        modules.add(name)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+                pending.append(node.module)
+    return modules
+
+
+def generator_hash():
+    # Any change to the code that renders outputs invalidates every output.
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(generator_modules(src_dir)):
+        filename = name + ".py"
+        digest.update(filename.encode())
+        with open(os.path.join(src_dir, filename), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path, output_dir, shard=None):
+        self.path = path
+        self.output_dir = output_dir
+        # (index, count) for the partial manifest of one shard of a build.
+        self.shard = shard
+        self.entries = {}
+        self.seen = set()
+        # Outputs recorded or removed since the last save, and the number
+        # of lines in the journal (see save_changes).
+        self.dirty = set()
+        self.journal_length = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == MANIFEST_VERSION and data.get("shard") == self.shard_header():
+            self.entries = data.get("entries", {})
+            self.replay_journal()
+        return self
+
+    def journal_path(self):
+        return self.path + ".journal"
+
+    def replay_journal(self):
+        try:
+            with open(self.journal_path(), "r") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                dest_path, entry = json.loads(line)
+            except (ValueError, TypeError):
+                # A line cut short by a crash ends the journal.
+                break
+            if entry is None:
+                self.entries.pop(dest_path, None)
+            else:
+                self.entries[dest_path] = entry
+            self.journal_length += 1
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        data = {"version": MANIFEST_VERSION, "entries": self.entries}
+        if self.shard is not None:
+            data["shard"] = self.shard_header()
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        # The journal goes first: replayed over the new file it would
+        # bring back older entries.
+        if os.path.exists(self.journal_path()):
+            os.remove(self.journal_path())
+        os.replace(tmp_path, self.path)
+        self.dirty = set()
+        self.journal_length = 0
+
+    def save_changes(self):
+        # Appends the entries recorded or removed since the last save to
+        # the journal next to the manifest, one JSON line each, so a
+        # rebuild that wrote a few outputs does not rewrite the whole
+        # file. load() replays the journal; it is folded into the
+        # manifest once it has as many lines as the manifest has entries.
+        if not os.path.exists(self.path) or self.journal_length + len(self.dirty) > len(self.entries):
+            self.save()
+            return
+        with open(self.journal_path(), "a") as f:
+            for dest_path in sorted(self.dirty):
+                f.write(json.dumps([dest_path, self.entries.get(dest_path)], sort_keys=True) + "\n")
+        self.journal_length += len(self.dirty)
+        self.dirty = set()
+
+    def shard_header(self):
+        return None if self.shard is None else list(self.shard)
+
+    def is_fresh(self, dest_path, inputs):
+        self.seen.add(dest_path)
+        entry = self.entries.get(dest_path)
+        if entry is None or entry["inputs"] != inputs:
+            return False
+        return os.path.exists(dest_path)
+
+    def record(self, dest_path, source_path, inputs, kind="page", links=None):
+        self.seen.add(dest_path)
+        self.dirty.add(dest_path)
+        self.entries[dest_path] = {"source": source_path, "inputs": inputs, "kind": kind}
+        if links is not None:
+            self.entries[dest_path]["links"] = [list(link) for link in links]
+
+    def remove_orphans(self, kind=None):
+        removed = []
+        for dest_path in sorted(set(self.entries) - self.seen):
+            if kind is not None and self.entries[dest_path].get("kind", "page") != kind:
+                continue
+            self.remove(dest_path)
+            removed.append(dest_path)
+        return removed
+
+    def remove(self, dest_path):
+        if self.entries.pop(dest_path, None) is not None:
+            self.dirty.add(dest_path)
+        self.seen.discard(dest_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), self.output_dir)
+
+    def summary(self):
+        return f"{self.rendered} rendered, {self.skipped} skipped, {self.removed} removed"
+
+
+def remove_empty_dirs(dir_path, stop_dir):
+    stop_dir = os.path.normpath(stop_dir)
+    while dir_path and os.path.normpath(dir_path) != stop_dir and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,107 @@
+import re
+
+from htmlnode import VOID_TAGS
+
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r\f]+")
+UNQUOTED_VALUE_RE = re.compile(r"[A-Za-z0-9_./:#%?&;+,-]+")
+COMMENT_RE = re.compile(r"<!--(?!\[).*?-->", re.DOTALL)
+TOKEN_RE = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>|<[^>]*>", re.DOTALL | re.IGNORECASE)
+TAG_NAME_RE = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)")
+TAG_ATTR_RE = re.compile(r'[ \t\n\r\f]+([^\s"\'=<>/]+)(?:="([^"]*)")?')
+
+# Whitespace next to these tags never renders.
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "base", "blockquote", "body", "br", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "head", "header", "hr", "html", "li", "link", "main", "meta", "nav", "ol", "p", "pre",
+    "section", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul", "!doctype",
+))
+
+
+class Minifier:
+    # Counts the characters it removes. Only ASCII whitespace, quotes,
+    # comments and closing tags of void elements are ever dropped, so
+    # characters saved equal bytes saved.
+    def __init__(self):
+        self.saved = 0
+
+    def text(self, value):
+        collapsed = WHITESPACE_RE.sub(" ", value)
+        self.saved += len(value) - len(collapsed)
+        return collapsed
+
+    def props(self, props):
+        parts = []
+        for key, value in props.items():
+            if UNQUOTED_VALUE_RE.fullmatch(value):
+                parts.append(f" {key}={value}")
+                self.saved += 2
+            else:
+                parts.append(f' {key}="{value}"')
+        return "".join(parts)
+
+    def html(self, html):
+        # Minifies a whole fragment such as the page template: drops
+        # comments and whitespace next to block-level tags, collapses the
+        # rest and unquotes attribute values. <pre>, <textarea>, <script>
+        # and <style> elements are kept exactly as written.
+        source = COMMENT_RE.sub("", html)
+        parts = []
+        pos = 0
+        previous = None
+        for match in TOKEN_RE.finditer(source):
+            tag = match.group(0)
+            name = tag_name(tag)
+            parts.append(minify_whitespace(source[pos:match.start()], previous, name))
+            parts.append(tag if match.group(1) else minify_tag(tag, name))
+            previous = name
+            pos = match.end()
+        parts.append(minify_whitespace(source[pos:], previous, None))
+        minified = "".join(parts)
+        self.saved += len(html) - len(minified)
+        return minified
+
+
+def tag_name(tag):
+    if tag.startswith("<!"):
+        return "!" + tag[2:].rstrip(">").split(None, 1)[0].lower()
+    match = TAG_NAME_RE.match(tag)
+    return None if match is None else match.group(1).lower()
+
+def minify_whitespace(text, before, after):
+    if text.strip(" \t\n\r\f"):
+        return WHITESPACE_RE.sub(" ", text)
+    if not text or before is None or after is None or before in BLOCK_TAGS or after in BLOCK_TAGS:
+        return ""
+    return " "
+
+def minify_tag(tag, name):
+    head = TAG_NAME_RE.match(tag)
+    if head is None:
+        return tag
+    body = tag[head.end():-1]
+    self_closing = body.rstrip(" \t\n\r\f").endswith("/")
+    if self_closing:
+        body = body.rstrip(" \t\n\r\f")[:-1]
+    attrs = []
+    pos = 0
+    for match in TAG_ATTR_RE.finditer(body):
+        if match.start() != pos:
+            # Unquoted or single-quoted values: leave the tag as written.
+            return tag
+        key, value = match.groups()
+        if value is None:
+            attrs.append(f" {key}")
+        elif UNQUOTED_VALUE_RE.fullmatch(value):
+            attrs.append(f" {key}={value}")
+        else:
+            attrs.append(f' {key}="{value}"')
+        pos = match.end()
+    if body[pos:].strip(" \t\n\r\f"):
+        return tag
+    closing = "/>" if self_closing and name not in VOID_TAGS else ">"
+    if closing == "/>" and attrs and "=" in attrs[-1] and '"' not in attrs[-1]:
+        # "/" would be read as part of an unquoted value.
+        closing = " />"
+    return head.group(0) + "".join(attrs) + closing
@@ -0,0 +1,96 @@
+import cProfile
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+
+class StageTimer:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class BuildProfiler:
+    def __init__(self, top=10, dump_path=None, trace_memory=False):
+        self.top = top
+        self.dump_path = dump_path
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.pages = []
+        self.peak_memory = None
+        self.cprofile = None
+
+    def stage(self, name):
+        return StageTimer(self, name)
+
+    def add(self, name, seconds, calls=1):
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+
+    def timed_iter(self, name, iterable):
+        # Times each step of an iterator, such as reads from a source file.
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def add_page(self, from_path, seconds, source_bytes, output_bytes):
+        self.pages.append((seconds, from_path, source_bytes, output_bytes))
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.dump_path:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.add("total", time.perf_counter() - self.started)
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.dump_path)
+        if self.trace_memory:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    def report(self):
+        lines = ["Build profile:", f"  {'stage':<16}{'calls':>8}{'total ms':>12}{'mean ms':>10}"]
+        for name, (seconds, calls) in self.stages.items():
+            lines.append(f"  {name:<16}{calls:>8}{seconds * 1000:>12.2f}{seconds * 1000 / calls:>10.3f}")
+        if self.pages:
+            lines.append(f"Slowest {min(self.top, len(self.pages))} of {len(self.pages)} pages:")
+            for seconds, from_path, source_bytes, output_bytes in sorted(self.pages, reverse=True)[:self.top]:
+                lines.append(
+                    f"  {seconds * 1000:9.2f} ms {source_bytes:>10} B -> {output_bytes:>10} B  {from_path}"
+                )
+        if self.peak_memory is not None:
+            lines.append(f"Peak traced memory: {self.peak_memory / 1024 / 1024:.1f} MiB")
+        if self.dump_path:
+            lines.append(f"cProfile stats written to {self.dump_path}")
+        return "\n".join(lines)
+
+
+NO_TIMER = nullcontext()
+
+
+def stage_timer(profiler, name):
+    # Shared no-op when not profiling, so unprofiled builds allocate nothing.
+    if profiler is None:
+        return NO_TIMER
+    return profiler.stage(name)
@@ -0,0 +1,50 @@
+import hashlib
+import json
+
+from template import UrlResolver
+
+
+class RenderContext:
+    # Site-wide data that changes how inline nodes render, including where
+    # link and image URLs point. Passed down to text_node_to_html_node;
+    # its fingerprint joins the page and block cache keys so cached output
+    # never outlives the data it used.
+    def __init__(self, basepath="/", images=None, assets=None, minify=False):
+        self.basepath = basepath
+        self.images = images
+        self.assets = assets
+        self.minify = minify
+        self.urls = UrlResolver(basepath, assets)
+        self._fingerprint = None
+
+    def fingerprint(self):
+        if self._fingerprint is None:
+            data = json.dumps({
+                "basepath": self.basepath,
+                "images": self.images,
+                "assets": None if self.assets is None else self.assets.fingerprint(),
+                "minify": self.minify,
+            }, sort_keys=True)
+            self._fingerprint = hashlib.sha256(data.encode()).hexdigest()
+        return self._fingerprint
+
+    def site_url(self, url):
+        return self.urls.resolve(url)
+
+    def image_props(self, url, alt):
+        props = {"src": self.site_url(url), "alt": alt}
+        if self.images is None:
+            return props
+        image = self.images.get(url)
+        if image is not None:
+            props["width"] = str(image["width"])
+            props["height"] = str(image["height"])
+            if len(image["variants"]) > 1:
+                props["srcset"] = ", ".join(
+                    f"{self.site_url(variant_url)} {width}w" for variant_url, width in image["variants"]
+                )
+                props["sizes"] = f"(max-width: {image['width']}px) 100vw, {image['width']}px"
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return props
+
@@ -0,0 +1,289 @@
+import json
+import os
+import re
+
+from block_markdown import BlockType, iter_block_spans, parse_block
+from gencontent import extract_title
+from inline_markdown import text_to_textnodes
+from manifest import hash_bytes, hash_file
+
+
+INDEX_VERSION = 2
+SHARD_TARGET_TERMS = 1000
+SINGLE_SHARD_NAME = "all"
+MIN_TERM_LENGTH = 2
+TITLE_WEIGHT = 5
+HEADING_WEIGHT = 3
+TERM_RE = re.compile(r"[^\W_]+")
+SHARD_NAME_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset((
+    "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "he", "her", "his",
+    "in", "is", "it", "its", "of", "on", "or", "she", "that", "the", "their", "they", "this", "to",
+    "was", "were", "which", "with",
+))
+
+
+def page_terms(markdown):
+    # Weighted term counts for one page, from the same block and inline
+    # parsers the renderer uses. Code blocks are left out.
+    terms = {}
+    for text, start, end in iter_block_spans([markdown]):
+        block = parse_block(text, start)
+        if block.block_type == BlockType.CODE:
+            continue
+        weight = 1
+        if block.block_type == BlockType.HEADING:
+            weight = TITLE_WEIGHT if block.level == 1 else HEADING_WEIGHT
+        for content in block.items if block.items is not None else [block.content]:
+            for text_node in text_to_textnodes(content):
+                add_terms(terms, text_node.text, weight)
+    return terms
+
+def add_terms(terms, text, weight):
+    for term in TERM_RE.findall(text.lower()):
+        if len(term) >= MIN_TERM_LENGTH and term not in STOP_WORDS:
+            terms[term] = terms.get(term, 0) + weight
+
+def shard_prefix_length(term_count):
+    # Shards are keyed by a term prefix just long enough to keep them near
+    # SHARD_TARGET_TERMS terms each: a small site gets a single shard
+    # instead of one file per two-letter prefix.
+    if term_count <= SHARD_TARGET_TERMS:
+        return 0
+    if term_count <= SHARD_TARGET_TERMS * 26:
+        return 1
+    return 2
+
+def shard_name(term, prefix_length):
+    if prefix_length == 0:
+        return SINGLE_SHARD_NAME
+    prefix = term[:prefix_length]
+    if SHARD_NAME_RE.fullmatch(prefix):
+        return prefix
+    return "_" + prefix.encode().hex()
+
+def page_url(dest_path, output_dir, basepath):
+    relative = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    if relative == "index.html" or relative.endswith("/index.html"):
+        relative = relative[:-len("index.html")]
+    return basepath.rstrip("/") + "/" + relative
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("pages", {})
+
+def save_cache(cache_path, pages):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": INDEX_VERSION, "pages": pages}, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def assign_ids(pages, old_pages):
+    # Pages keep their id between builds and new pages take the lowest
+    # free ones, so a single added page does not renumber every shard.
+    ids = {}
+    used = set()
+    for dest_path in pages:
+        old = old_pages.get(dest_path)
+        if old is not None:
+            ids[dest_path] = old["id"]
+            used.add(old["id"])
+    next_id = 0
+    for dest_path in pages:
+        if dest_path in ids:
+            continue
+        while next_id in used:
+            next_id += 1
+        ids[dest_path] = next_id
+        used.add(next_id)
+    return ids
+
+def write_if_changed(path, data):
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def encode_json(value):
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode()
+
+
+class SearchIndex:
+    # The search index written to one output directory. The postings,
+    # shard membership and hashes of the written files stay in memory
+    # between updates, so a long-lived index (the watcher keeps one)
+    # re-encodes only the shards whose terms changed.
+    def __init__(self, output_dir, basepath, cache_path):
+        self.output_dir = output_dir
+        self.basepath = basepath
+        self.cache_path = cache_path
+        self.search_dir = os.path.join(output_dir, "search")
+        self.pages = load_cache(cache_path)
+        # term -> {page id: weight}; None until the first update.
+        self.postings = None
+        self.prefix_length = None
+        self.shard_terms = {}
+        self.urls = {}
+        # filename -> (hash, size) of each file as last written.
+        self.written = {}
+
+    def update(self, pages, manifest=None):
+        # Terms are cached per page by source hash, so only changed pages
+        # are parsed again, and files whose content did not change are
+        # left untouched.
+        old_pages = self.pages
+        current = {}
+        indexed = 0
+        for from_path, dest_path in pages:
+            entry = None if manifest is None else manifest.entries.get(dest_path)
+            if entry is not None and "source" in entry["inputs"]:
+                source_hash = entry["inputs"]["source"]
+            else:
+                source_hash = hash_file(from_path)
+            old = old_pages.get(dest_path)
+            if old is not None and old["source"] == source_hash:
+                current[dest_path] = old
+                continue
+            with open(from_path, "r") as f:
+                markdown = f.read()
+            current[dest_path] = {
+                "source": source_hash,
+                "title": extract_title(markdown),
+                "terms": page_terms(markdown),
+            }
+            indexed += 1
+        ids = assign_ids(current, old_pages)
+        for dest_path, page in current.items():
+            page["id"] = ids[dest_path]
+
+        touched = None
+        if self.postings is None:
+            self.postings = {}
+            for page in current.values():
+                self.add_postings(page)
+        else:
+            touched = set()
+            for dest_path, old in old_pages.items():
+                if current.get(dest_path) is not old:
+                    self.remove_postings(old)
+                    touched.update(old["terms"])
+            for dest_path, page in current.items():
+                if old_pages.get(dest_path) is not page:
+                    self.add_postings(page)
+                    touched.update(page["terms"])
+        self.pages = current
+        changed_shards = self.update_shards(touched)
+
+        documents = [None] * (max(ids.values()) + 1 if ids else 0)
+        for dest_path, page in current.items():
+            url = self.urls.get(dest_path)
+            if url is None:
+                url = self.urls[dest_path] = page_url(dest_path, self.output_dir, self.basepath)
+            documents[page["id"]] = [url, page["title"]]
+        outputs = {"index.json": encode_json({
+            "version": INDEX_VERSION,
+            "prefix_length": self.prefix_length,
+            "pages": documents,
+            "shards": sorted(self.shard_terms),
+        })}
+        for name in changed_shards:
+            outputs[f"{name}.json"] = encode_json({
+                term: sorted([page_id, weight] for page_id, weight in self.postings[term].items())
+                for term in self.shard_terms[name]
+            })
+
+        os.makedirs(self.search_dir, exist_ok=True)
+        written = 0
+        for filename, data in outputs.items():
+            digest = hash_bytes(data)
+            if self.written.get(filename, (None,))[0] == digest:
+                continue
+            dest_path = os.path.join(self.search_dir, filename)
+            if write_if_changed(dest_path, data):
+                written += 1
+            self.written[filename] = (digest, len(data))
+            if manifest is not None:
+                manifest.record(dest_path, self.cache_path, {"hash": digest}, "search")
+        current_files = {"index.json"} | {f"{name}.json" for name in self.shard_terms}
+        for filename in sorted(set(self.written) - current_files):
+            del self.written[filename]
+            if manifest is not None:
+                manifest.remove(os.path.join(self.search_dir, filename))
+        if manifest is not None and touched is None:
+            manifest.remove_orphans("search")
+        return {
+            "pages": len(current),
+            "indexed": indexed,
+            "shards": len(self.shard_terms),
+            "written": written,
+            "bytes": sum(size for digest, size in self.written.values()),
+        }
+
+    def add_postings(self, page):
+        for term, weight in page["terms"].items():
+            self.postings.setdefault(term, {})[page["id"]] = weight
+
+    def remove_postings(self, page):
+        for term in page["terms"]:
+            pairs = self.postings[term]
+            del pairs[page["id"]]
+            if not pairs:
+                del self.postings[term]
+
+    def update_shards(self, touched):
+        # Returns the names of the shards to encode again: all of them on
+        # the first update or when the prefix length changes, otherwise
+        # those holding a term in `touched`.
+        prefix_length = shard_prefix_length(len(self.postings))
+        if touched is None or prefix_length != self.prefix_length:
+            self.prefix_length = prefix_length
+            self.shard_terms = {}
+            for term in self.postings:
+                self.shard_terms.setdefault(shard_name(term, prefix_length), set()).add(term)
+            return set(self.shard_terms)
+        changed = set()
+        for term in touched:
+            name = shard_name(term, prefix_length)
+            terms = self.shard_terms.setdefault(name, set())
+            if term in self.postings:
+                terms.add(term)
+            else:
+                terms.discard(term)
+            changed.add(name)
+        for name in list(changed):
+            if not self.shard_terms[name]:
+                del self.shard_terms[name]
+                changed.discard(name)
+        return changed
+
+    def save(self):
+        save_cache(self.cache_path, self.pages)
+
+
+def build_search_index(pages, output_dir, basepath, cache_path, manifest=None):
+    # Writes search/index.json (page URLs and titles by id, the prefix
+    # length and the shard names) and one search/<prefix>.json shard per
+    # term prefix, or search/all.json for small sites, mapping each term
+    # to [page id, weight] pairs.
+    index = SearchIndex(output_dir, basepath, cache_path)
+    stats = index.update(pages, manifest)
+    index.save()
+    return stats
@@ -0,0 +1,232 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from gencontent import render_page
+
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+MIN_GZIP_SIZE = 1024
+
+
+class Resource:
+    def __init__(self, body, content_type, dependencies):
+        self.body = body
+        self.content_type = content_type
+        # (path, (mtime_ns, size)) pairs; None for files that must stay missing.
+        self.dependencies = dependencies
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+        self.gzip_body = None
+
+    def is_current(self):
+        return all(file_signature(path) == signature for path, signature in self.dependencies)
+
+    def compressible(self):
+        return len(self.body) >= MIN_GZIP_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def gzipped(self):
+        if self.gzip_body is None:
+            self.gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self.gzip_body
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PreviewSite:
+    # Renders pages straight from the content directory on request and
+    # keeps the results in memory. Each cached resource remembers the
+    # files it was made from and is rebuilt once any of them changes.
+    def __init__(self, dir_path_content, dir_path_static, template_path, basepath, context=None):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.basepath = "/" + basepath.strip("/")
+        self.context = context
+        self.resources = {}
+        self.lock = threading.Lock()
+
+    def site_path(self, url_path):
+        # Returns the path below the basepath, or None outside of it.
+        if self.basepath == "/":
+            return url_path
+        if url_path == self.basepath or url_path.startswith(self.basepath + "/"):
+            return url_path[len(self.basepath):] or "/"
+        return None
+
+    def lookup(self, site_path):
+        with self.lock:
+            resource = self.resources.get(site_path)
+        if resource is not None and resource.is_current():
+            return resource
+        resource = self.load(site_path)
+        with self.lock:
+            if resource is None:
+                self.resources.pop(site_path, None)
+            else:
+                self.resources[site_path] = resource
+        return resource
+
+    def load(self, site_path):
+        relative = posixpath.normpath(site_path).lstrip("/")
+        if relative.startswith("..") or "\0" in relative:
+            return None
+        if relative == ".":
+            relative = ""
+        page = self.page_source(relative, site_path.endswith("/"))
+        if page is not None:
+            return self.render(page, site_path)
+        static_path = os.path.join(self.dir_path_static, *relative.split("/"))
+        if relative and os.path.isfile(static_path):
+            with open(static_path, "rb") as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(static_path)[0] or "application/octet-stream"
+            return Resource(body, content_type, [(static_path, file_signature(static_path))])
+        return None
+
+    def page_source(self, relative, is_directory):
+        parts = [part for part in relative.split("/") if part]
+        if is_directory or not parts:
+            path = os.path.join(self.dir_path_content, *parts, "index.md")
+        elif parts[-1].endswith(".html"):
+            path = os.path.join(self.dir_path_content, *parts[:-1], parts[-1][:-5] + ".md")
+        else:
+            return None
+        return path if os.path.isfile(path) else None
+
+    def render(self, from_path, site_path):
+        with open(from_path, "r") as f:
+            markdown = f.read()
+        page, _ = render_page(markdown, self.template_path, site_path, self.basepath, context=self.context)
+        dependencies = [
+            (from_path, file_signature(from_path)),
+            (self.template_path, file_signature(self.template_path)),
+        ]
+        return Resource(page.encode(), "text/html; charset=utf-8", dependencies)
+
+    def redirect_for(self, site_path):
+        # "/blog/tom" -> "/blog/tom/" when that is a page, as static hosts do.
+        if site_path.endswith("/"):
+            return None
+        parts = [part for part in site_path.split("/") if part]
+        if os.path.isfile(os.path.join(self.dir_path_content, *parts, "index.md")):
+            return self.basepath.rstrip("/") + site_path + "/"
+        return None
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SitePreview"
+
+    def do_GET(self):
+        self.respond(include_body=True)
+
+    def do_HEAD(self):
+        self.respond(include_body=False)
+
+    def respond(self, include_body):
+        site = self.server.site
+        url_path = unquote(urlsplit(self.path).path)
+        site_path = site.site_path(url_path)
+        if site_path is None:
+            if url_path == "/":
+                return self.send_redirect(site.basepath + "/")
+            return self.send_text(HTTPStatus.NOT_FOUND, "Not found\n", include_body)
+        try:
+            resource = site.lookup(site_path)
+        except Exception as e:
+            return self.send_text(HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to render {url_path}: {e}\n", include_body)
+        if resource is None:
+            location = site.redirect_for(site_path)
+            if location is not None:
+                return self.send_redirect(location)
+            return self.send_text(HTTPStatus.NOT_FOUND, "Not found\n", include_body)
+
+        body = resource.body
+        etag = resource.etag
+        encoding = None
+        if resource.compressible() and accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            body = resource.gzipped()
+            etag = etag[:-1] + '-gzip"'
+            encoding = "gzip"
+        if etag in parse_etags(self.headers.get("If-None-Match", "")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if resource.compressible():
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def send_redirect(self, location):
+        self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_text(self, status, text, include_body):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def accepts_gzip(accept_encoding):
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def parse_etags(if_none_match):
+    if if_none_match.strip() == "*":
+        return {"*"}
+    return {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+class PreviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, site, verbose=True):
+        super().__init__(address, PreviewHandler)
+        self.site = site
+        self.verbose = verbose
+
+
+def serve(site, host="127.0.0.1", port=8888):
+    server = PreviewServer((host, port), site)
+    host, port = server.server_address[:2]
+    print(f"Serving {site.dir_path_content} at http://{host}:{port}{site.basepath.rstrip('/')}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped serving.")
+    finally:
+        server.server_close()
@@ -0,0 +1,101 @@
+import hashlib
+import os
+
+from manifest import BuildManifest, hash_file
+
+
+# Names of page build inputs in merge errors.
+SETTING_NAMES = {"context": "site options"}
+
+
+def parse_shard(text):
+    # "2/4" -> (2, 4); shards are numbered from 1.
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"invalid shard {text!r}: expected i/N, e.g. 1/4") from None
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}: expected 1 <= i <= N")
+    return index, count
+
+def shard_of(rel_path, count):
+    # Stable across machines and Python runs, unlike hash().
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def select_shard(pages, dir_path_content, shard):
+    index, count = shard
+    return [
+        (from_path, dest_path) for from_path, dest_path in pages
+        if shard_of(os.path.relpath(from_path, dir_path_content), count) == index
+    ]
+
+def shard_path(path, shard):
+    # "./.cache/build-manifest.json" -> "./.cache/build-manifest.shard-2-of-4.json"
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def merge_shard_manifests(manifest, manifest_path, pages, dir_path_content, count, build_inputs):
+    # Checks that the N partial manifests together cover exactly the
+    # current pages, each built by the shard it belongs to from the
+    # current source and with the current template, generator and site
+    # options (`build_inputs`, as from page_build_inputs), then copies
+    # their page entries into `manifest`. Raises with every problem
+    # found; nothing is merged on failure.
+    sources = {dest_path: from_path for from_path, dest_path in pages}
+    owners = {
+        dest_path: shard_of(os.path.relpath(from_path, dir_path_content), count)
+        for from_path, dest_path in pages
+    }
+    problems = []
+    reported = set()
+    merged = {}
+    for index in range(1, count + 1):
+        path = shard_path(manifest_path, (index, count))
+        if not os.path.exists(path):
+            problems.append(f"shard {index}/{count}: no manifest at {path}")
+            continue
+        shard_manifest = BuildManifest(path, manifest.output_dir, (index, count)).load()
+        for dest_path, entry in shard_manifest.entries.items():
+            if entry.get("kind", "page") != "page":
+                continue
+            owner = owners.get(dest_path)
+            if owner is None:
+                problems.append(f"shard {index}/{count}: {dest_path} has no source page")
+                continue
+            if owner != index:
+                problems.append(f"shard {index}/{count}: {dest_path} belongs to shard {owner}/{count}")
+                continue
+            reported.add(dest_path)
+            if not os.path.exists(dest_path):
+                problems.append(f"shard {index}/{count}: {dest_path} is missing")
+                continue
+            if entry["inputs"].get("source") != hash_file(sources[dest_path]):
+                problems.append(f"shard {index}/{count}: {dest_path} is out of date with {sources[dest_path]}")
+                continue
+            entry_settings = {name: value for name, value in entry["inputs"].items() if name != "source"}
+            if entry_settings.get("basepath") != build_inputs.get("basepath"):
+                problems.append(f"shard {index}/{count}: {dest_path} was built for basepath {entry_settings.get('basepath')!r}")
+                continue
+            if entry_settings != build_inputs:
+                changed = sorted(
+                    SETTING_NAMES.get(name, name) for name in set(entry_settings) | set(build_inputs)
+                    if entry_settings.get(name) != build_inputs.get(name)
+                )
+                problems.append(
+                    f"shard {index}/{count}: {dest_path} was built with a different {', '.join(changed)}; "
+                    "rebuild the shard"
+                )
+                continue
+            merged[dest_path] = entry
+    for dest_path in sorted(set(owners) - reported):
+        problems.append(f"shard {owners[dest_path]}/{count}: {dest_path} has not been built")
+    if problems:
+        details = "\n".join(f"  {problem}" for problem in problems)
+        raise Exception(f"cannot merge {count} shard(s):\n{details}")
+    for dest_path, entry in merged.items():
+        manifest.entries[dest_path] = entry
+        manifest.seen.add(dest_path)
+    return len(merged)
@@ -0,0 +1,112 @@
+import os
+import re
+
+from minify import UNQUOTED_VALUE_RE, Minifier
+
+
+PLACEHOLDER_RE = re.compile(r"\{\{ (\w+) \}\}")
+
+
+class Template:
+    def __init__(self, literals, slots, saved=0):
+        # literals[i] is emitted before slots[i]; literals has one extra
+        # trailing entry, so rendering is a single interleaved join.
+        # saved is how many bytes minification removed from the literals.
+        self.literals = literals
+        self.slots = slots
+        self.saved = saved
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            parts.append(values.get(name, raw))
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(self, sink, values):
+        # Values may be strings or callables that stream into the sink.
+        sink.write(self.literals[0])
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name, raw)
+            if callable(value):
+                value(sink)
+            else:
+                sink.write(value)
+            sink.write(literal)
+
+    def __repr__(self):
+        return f"Template(literals={self.literals}, slots={self.slots})"
+
+
+URL_ATTR_RE = re.compile(r'(href|src)=(?:"(/[^"]*)"|(/[^\s"\'=<>`]*))')
+URL_SUFFIX_RE = re.compile(r"[?#]")
+
+
+class UrlResolver:
+    # Maps site-absolute URLs ("/index.css") to their published form: the
+    # fingerprinted asset name when there is one, under the basepath.
+    def __init__(self, basepath, assets=None):
+        self.prefix = basepath.rstrip("/")
+        self.assets = assets
+        self._resolved = {}
+
+    def resolve(self, url):
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        if self.assets is not None:
+            match = URL_SUFFIX_RE.search(url)
+            end = len(url) if match is None else match.start()
+            url = self.assets.get(url[:end], url[:end]) + url[end:]
+        return self.prefix + url
+
+    def rewrite(self, html):
+        return URL_ATTR_RE.sub(self._rewrite_match, html)
+
+    def _rewrite_match(self, match):
+        attr = match.group(0)
+        rewritten = self._resolved.get(attr)
+        if rewritten is None:
+            if match.group(2) is not None:
+                rewritten = f'{match.group(1)}="{self.resolve(match.group(2))}"'
+            else:
+                # Left unquoted by the minifier; keep it that way if we can.
+                url = self.resolve(match.group(3))
+                if UNQUOTED_VALUE_RE.fullmatch(url):
+                    rewritten = f"{match.group(1)}={url}"
+                else:
+                    rewritten = f'{match.group(1)}="{url}"'
+            self._resolved[attr] = rewritten
+        return rewritten
+
+
+def compile_template(text, basepath, assets=None, minify=False):
+    text = UrlResolver(basepath, assets).rewrite(text)
+    saved = 0
+    if minify:
+        minifier = Minifier()
+        text = minifier.html(text)
+        saved = minifier.saved
+    literals = []
+    slots = []
+    pos = 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        literals.append(text[pos:match.start()])
+        slots.append((match.group(1), match.group(0)))
+        pos = match.end()
+    literals.append(text[pos:])
+    return Template(literals, slots, saved)
+
+
+_compiled_templates = {}
+
+def load_template(template_path, basepath, assets=None, minify=False):
+    stat = os.stat(template_path)
+    assets_key = None if assets is None else assets.fingerprint()
+    key = (template_path, basepath, assets_key, minify, stat.st_mtime_ns, stat.st_size)
+    template = _compiled_templates.get(key)
+    if template is None:
+        with open(template_path, "r") as f:
+            template = compile_template(f.read(), basepath, assets, minify)
+        _compiled_templates.clear()
+        _compiled_templates[key] = template
+    return template
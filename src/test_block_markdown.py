@@ -1,6 +1,16 @@
+import io
 import unittest
 
-from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from block_markdown import (
+    BlockType,
+    block_to_block_type,
+    iter_block_spans,
+    markdown_links,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    parse_block,
+    write_markdown_html,
+)
 from textnode import TextNode, TextType
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -185,6 +195,91 @@ the **same** even with inline stuff
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
-        
+
+
+class TestIterBlocks(unittest.TestCase):
+    md = """
+# Title
+
+This is **bolded** paragraph
+on two lines
+
+
+
+- a list
+- with items
+  \t
+\n\n\n"""
+
+    def test_lines_match_markdown_to_blocks(self):
+        self.assertEqual([text for text, start, end in iter_block_spans(io.StringIO(self.md))], markdown_to_blocks(self.md))
+
+    def test_any_chunk_size_matches_markdown_to_blocks(self):
+        for size in range(1, 8):
+            chunks = [self.md[i:i + size] for i in range(0, len(self.md), size)]
+            self.assertEqual([text for text, start, end in iter_block_spans(chunks)], markdown_to_blocks(self.md), size)
+
+    def test_blocks_are_yielded_as_they_complete(self):
+        blocks = iter_block_spans(iter(["first\n", "\n", "second"]))
+        self.assertEqual(next(blocks)[0], "first")
+
+    def test_write_markdown_html(self):
+        sink = io.StringIO()
+        write_markdown_html(io.StringIO(self.md), sink)
+        self.assertEqual(sink.getvalue(), markdown_to_html_node(self.md).to_html())
+
+    def test_spans_point_into_source(self):
+        spans = list(iter_block_spans([self.md]))
+        self.assertEqual(len(spans), 3)
+        for text, start, end in spans:
+            self.assertEqual(self.md[start:end], text)
+
+
+class TestParseBlock(unittest.TestCase):
+    def test_heading(self):
+        block = parse_block("### Title *x*", 10)
+        self.assertEqual(block.block_type, BlockType.HEADING)
+        self.assertEqual((block.level, block.content), (3, "Title *x*"))
+        self.assertEqual((block.start, block.end), (10, 23))
+
+    def test_lists(self):
+        self.assertEqual(parse_block("- a\n- b").items, ["a", "b"])
+        self.assertEqual(parse_block("1. a\n2. b").items, ["a", "b"])
+
+    def test_quote_and_paragraph_content(self):
+        self.assertEqual(parse_block("> a\n>b").content, "a b")
+        self.assertEqual(parse_block("> a\nb").content, "> a b")
+
+    def test_code_body(self):
+        block = parse_block("```\ncode\n```")
+        self.assertEqual((block.block_type, block.content), (BlockType.CODE, "code\n"))
+
+    def test_invalid_code_block_reports_location(self):
+        md = "para\n\n```\ncode\n```py"
+        with self.assertRaisesRegex(ValueError, "characters 6-20"):
+            markdown_to_html_node(md)
+
+
+class TestMarkdownLinks(unittest.TestCase):
+    def test_collects_internal_targets_with_offsets(self):
+        md = "# T\n\nSee [a](/a) and ![b](/img/b.png), [ext](https://x.org)\n\n- [c](/c?x=1)"
+        self.assertEqual(markdown_links(md), [("/a", 13), ("/img/b.png", 26), ("/c?x=1", 67)])
+
+    def test_collects_relative_targets(self):
+        md = "[a](../a/) [b](b.html#x) [c](#top) [d](mailto:me@x.org) [e](//cdn.x.org/e.js) ![f](f.png)"
+        self.assertEqual([url for url, offset in markdown_links(md)], ["../a/", "b.html#x", "f.png"])
+
+    def test_skips_code_blocks(self):
+        self.assertEqual(markdown_links("```\n[a](/a)\n```"), [])
+
+    def test_skips_inline_code_and_literal_spans(self):
+        md = "Use `[x](/missing)` or **[y](/bold)** for [z](/z)\n\n- `![i](/i.png)`\n- ![j](/j.png)"
+        self.assertEqual(markdown_links(md), [("/z", 46), ("/j.png", 75)])
+
+    def test_write_markdown_html_collects_links(self):
+        links = []
+        write_markdown_html(["p [a](/a)\n\n", "q [b](/b)"], io.StringIO(), links=links)
+        self.assertEqual(links, [("/a", 6), ("/b", 17)])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+import io
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node, write_markdown_html
+from blockcache import BlockCache
+from minify import Minifier
+
+
+LONG_PARAGRAPH = "This is **bold** and _italic_ text with a [link](https://example.com). " * 5
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "cache", "blocks.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, markdown, cache):
+        out = io.StringIO()
+        write_markdown_html([markdown], out, cache)
+        return out.getvalue()
+
+    def test_cached_render_matches_uncached(self):
+        markdown = f"# Title\n\n{LONG_PARAGRAPH}\n\n- one\n- two"
+        cache = BlockCache(self.cache_path)
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(self.render(markdown, cache), expected)
+        self.assertEqual(self.render(markdown, cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+    def test_persists_across_instances(self):
+        cache = BlockCache(self.cache_path)
+        self.render(LONG_PARAGRAPH, cache)
+        cache.close()
+
+        reopened = BlockCache(self.cache_path)
+        self.render(LONG_PARAGRAPH, reopened)
+        self.assertEqual((reopened.hits, reopened.misses), (1, 0))
+        reopened.close()
+
+    def test_minified_savings_survive_cache_hits(self):
+        markdown = f"{LONG_PARAGRAPH}  \n  {LONG_PARAGRAPH}"
+        cache = BlockCache(self.cache_path)
+        counts = []
+        for _ in range(2):
+            minifier = Minifier()
+            out = io.StringIO()
+            write_markdown_html([markdown], out, cache, minifier=minifier)
+            counts.append(minifier.saved)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertGreater(counts[0], 0)
+        self.assertEqual(counts[0], counts[1])
+        cache.close()
+
+    def test_short_blocks_are_not_cached(self):
+        cache = BlockCache(self.cache_path)
+        self.render("# Title\n\nshort", cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        cache.close()
+
+    def test_evict_keeps_most_recently_used(self):
+        cache = BlockCache(self.cache_path)
+        cache.put(cache.key("old"), "a" * 100)
+        cache.put(cache.key("new"), "b" * 100)
+        cache.commit()
+        self.assertEqual(cache.evict(150), 1)
+        self.assertEqual(cache.get("new")[1], "b" * 100)
+        self.assertIsNone(cache.get("old")[1])
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs, compressed_formats
+from manifest import BuildManifest
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, "docs")
+        os.makedirs(self.output_dir)
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.output_dir)
+        self.page = self.write("index.html", "<p>hello</p>" * 200)
+        self.small = self.write("small.css", "p{}")
+        self.image = self.write("logo.png", "x" * 4096)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.output_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        self.manifest.record(path, name, {}, "page" if name.endswith(".html") else "static")
+        return path
+
+    def test_compresses_large_text_outputs_only(self):
+        stats = compress_outputs(self.manifest)
+        self.assertEqual(stats["compressed"], 1)
+        with gzip.open(self.page + ".gz", "rb") as f, open(self.page, "rb") as page:
+            self.assertEqual(f.read(), page.read())
+        self.assertFalse(os.path.exists(self.small + ".gz"))
+        self.assertFalse(os.path.exists(self.image + ".gz"))
+        for suffix in compressed_formats():
+            self.assertIn(self.page + suffix, self.manifest.entries)
+
+    def test_unchanged_outputs_are_skipped(self):
+        compress_outputs(self.manifest)
+        os.utime(self.page, ns=(0, 0))
+        stats = compress_outputs(self.manifest)
+        self.assertEqual((stats["compressed"], stats["skipped"]), (0, 1))
+
+        self.write("index.html", "<p>changed</p>" * 200)
+        stats = compress_outputs(self.manifest)
+        self.assertEqual((stats["compressed"], stats["skipped"]), (1, 0))
+
+    def test_siblings_of_removed_outputs_are_removed(self):
+        compress_outputs(self.manifest)
+        self.manifest.remove(self.page)
+        stats = compress_outputs(self.manifest)
+        self.assertEqual(stats["removed"], len(compressed_formats()))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_only_given_outputs_are_considered(self):
+        other = self.write("about.html", "<p>about</p>" * 200)
+        stats = compress_outputs(self.manifest, dest_paths=[self.page])
+        self.assertEqual(stats["compressed"], 1)
+        self.assertFalse(os.path.exists(other + ".gz"))
+
+        self.manifest.remove(self.page)
+        stats = compress_outputs(self.manifest, dest_paths=[self.page])
+        self.assertEqual((stats["compressed"], stats["removed"]), (0, len(compressed_formats())))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
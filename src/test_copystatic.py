@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from assets import AssetMap
+from copystatic import sync_static_files
+from manifest import BuildManifest
+
+
+class TestSyncStaticFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.docs)
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, use_hash=False):
+        self.manifest.seen.clear()
+        return sync_static_files(self.static, self.docs, self.manifest, use_hash)
+
+    def test_first_sync_copies_everything(self):
+        stats = self.sync()
+        self.assertEqual(stats, {"copied": 2, "skipped": 0, "removed": 0})
+        with open(os.path.join(self.docs, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_unchanged_files_are_skipped(self):
+        self.sync()
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 2, "removed": 0})
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.sync(), {"copied": 1, "skipped": 1, "removed": 0})
+
+    def test_touched_file_skipped_with_hash(self):
+        self.sync()
+        css = os.path.join(self.static, "index.css")
+        os.utime(css, ns=(0, os.stat(css).st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(use_hash=True), {"copied": 0, "skipped": 2, "removed": 0})
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 2, "removed": 0})
+
+    def test_deleted_source_is_removed(self):
+        self.sync()
+        page = os.path.join(self.docs, "index.html")
+        self.write(page, "<p>page</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 1, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+        self.assertTrue(os.path.exists(page))
+
+
+class TestFingerprintStaticFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.docs)
+        os.makedirs(os.path.join(self.static, "images"))
+        for name, text in (("index.css", "body {}"), ("robots.txt", "ok"), (os.path.join("images", "a.png"), "png")):
+            with open(os.path.join(self.static, name), "w") as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, use_hash=False):
+        assets = AssetMap()
+        self.manifest.seen.clear()
+        self.stats = sync_static_files(self.static, self.docs, self.manifest, use_hash, assets)
+        return assets
+
+    def test_assets_are_published_under_hashed_names(self):
+        assets = self.sync()
+        css_url = assets.get("/index.css")
+        self.assertRegex(css_url, r"^/index\.[0-9a-f]{10}\.css$")
+        self.assertTrue(os.path.exists(os.path.join(self.docs, css_url[1:])))
+        self.assertIn("/images/a.png", assets.urls)
+        self.assertIsNone(assets.get("/robots.txt"))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "robots.txt")))
+
+    def test_changed_asset_replaces_old_name(self):
+        old_url = self.sync().get("/index.css")
+        with open(os.path.join(self.static, "index.css"), "w") as f:
+            f.write("body { color: red }")
+        new_url = self.sync().get("/index.css")
+        self.assertNotEqual(old_url, new_url)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, old_url[1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, new_url[1:])))
+
+    def test_touched_asset_skipped_with_hash(self):
+        old_url = self.sync().get("/index.css")
+        css = os.path.join(self.static, "index.css")
+        os.utime(css, ns=(0, os.stat(css).st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(use_hash=True).get("/index.css"), old_url)
+        self.assertEqual(self.stats, {"copied": 0, "skipped": 3, "removed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import unittest
+
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from corpus import CorpusShape, generate_corpus
+from gencontent import extract_title
+
+
+class TestCorpus(unittest.TestCase):
+    def test_same_seed_same_corpus(self):
+        shape = CorpusShape(pages=5, seed=3)
+        self.assertEqual(generate_corpus(shape), generate_corpus(CorpusShape(pages=5, seed=3)))
+        self.assertNotEqual(generate_corpus(shape), generate_corpus(CorpusShape(pages=5, seed=4)))
+
+    def test_shape(self):
+        pages = generate_corpus(CorpusShape(pages=6, depth=2, fanout=2, blocks=7))
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(pages[5][0].split(os.sep), ["section-1", "section-0", "page-5", "index.md"])
+        for _, markdown in pages:
+            self.assertEqual(len(markdown_to_blocks(markdown)), 8)
+
+    def test_pages_render(self):
+        shape = CorpusShape(pages=20, inline_density=0.5, block_mix={"code": 1, "olist": 1, "quote": 1})
+        seen = set()
+        for _, markdown in generate_corpus(shape):
+            extract_title(markdown)
+            markdown_to_html_node(markdown).to_html()
+            seen.update(block_to_block_type(block) for block in markdown_to_blocks(markdown)[1:])
+        self.assertEqual(seen, {BlockType.CODE, BlockType.OLIST, BlockType.QUOTE})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from buildclient import format_response, send_request
+from corpus import CorpusShape, generate_corpus, write_corpus
+from daemon import BuildDaemon, DaemonServer, remove_stale_socket
+from manifest import BuildManifest
+from watch import SiteWatcher
+
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        manifest = BuildManifest(os.path.join(root, "manifest.json"), self.public)
+        watcher = SiteWatcher(self.content, self.static, self.template, self.public, "/", manifest)
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher.rebuild(watcher.poll() | set(watcher.snapshot))
+        self.socket_path = os.path.join(root, "daemon.sock")
+        self.daemon = BuildDaemon(watcher, self.socket_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def handle(self, request):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.daemon.handle(request)
+
+    def test_build_renders_only_changed_pages(self):
+        self.assertEqual(self.handle({"command": "build"})["changed"], 0)
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog posts")
+        response = self.handle({"command": "build"})
+        self.assertTrue(response["ok"])
+        self.assertEqual((response["changed"], response["rendered"]), (1, 1))
+        with open(os.path.join(self.public, "blog", "index.html")) as f:
+            self.assertIn("Blog posts", f.read())
+
+    def test_build_failure_is_reported(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nunmatched **bold")
+        response = self.handle({"command": "build"})
+        self.assertFalse(response["ok"])
+        self.assertIn(os.path.join("content", "index.md") + ": invalid markdown, unmatched delimiter", response["error"])
+
+    def test_failed_page_is_retried_until_it_renders(self):
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "# Home\n\nunmatched **bold")
+        self.assertFalse(self.handle({"command": "build"})["ok"])
+        response = self.handle({"command": "build"})
+        self.assertFalse(response["ok"])
+        self.assertIn("unmatched delimiter", response["error"])
+        self.write(index, "# Home\n\nfixed **bold**")
+        response = self.handle({"command": "build"})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["rendered"], 1)
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("<b>bold</b>", f.read())
+        self.assertEqual(self.handle({"command": "build"})["changed"], 0)
+
+    def test_failed_page_is_retried_after_an_unrelated_change(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nunmatched **bold")
+        self.handle({"command": "build"})
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog posts")
+        response = self.handle({"command": "build"})
+        self.assertFalse(response["ok"])
+        self.assertEqual(response["rendered"], 1)
+        self.assertIn(os.path.join("content", "index.md"), response["error"])
+
+    def test_status_and_unknown_command(self):
+        self.handle({"command": "build"})
+        status = self.handle({"command": "status"})
+        self.assertEqual((status["pages"], status["builds"]), (2, 1))
+        self.assertFalse(self.handle({"command": "rebuild"})["ok"])
+
+    def test_requests_over_socket(self):
+        remove_stale_socket(self.socket_path)
+        server = DaemonServer(self.socket_path, self.daemon)
+        self.daemon.server = server
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            self.write(os.path.join(self.content, "index.md"), "# Home page")
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = send_request(self.socket_path, {"command": "build"}, timeout=10)
+            self.assertEqual(response["rendered"], 1)
+            self.assertTrue(format_response("build", response).startswith("Built in "))
+            for request in ([], "x", 1):
+                response = send_request(self.socket_path, request, timeout=10)
+                self.assertEqual(response, {"ok": False, "error": "bad request: expected a JSON object"})
+            with self.assertRaisesRegex(Exception, "already listening"):
+                remove_stale_socket(self.socket_path)
+            self.assertEqual(send_request(self.socket_path, {"command": "stop"}, timeout=10), {"ok": True})
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+        finally:
+            server.shutdown()
+            server.server_close()
+        remove_stale_socket(self.socket_path)
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+class TestBuildDaemonTiming(unittest.TestCase):
+    # A warm one-page build has to stay small next to a full build of the
+    # same site, compared as a ratio so the test does not depend on the
+    # machine's speed. Search is left out: the corpus has a few dozen
+    # distinct words, so its one shard holds every page and any edit
+    # re-encodes it (test_search covers the incremental index).
+    PAGES = 400
+
+    def test_warm_build_does_not_redo_the_site(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            static = os.path.join(root, "static")
+            public = os.path.join(root, "docs")
+            template = os.path.join(root, "template.html")
+            write_corpus(generate_corpus(CorpusShape(pages=self.PAGES, blocks=10)), content)
+            os.makedirs(static)
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {}\n" * 200)
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            manifest = BuildManifest(os.path.join(root, "manifest.json"), public)
+            watcher = SiteWatcher(
+                content, static, template, public, "/", manifest,
+                compress_min_size=0,
+                listing_dirs=("section-0",),
+                listing_cache_path=os.path.join(root, "listings.json"),
+            )
+            daemon = BuildDaemon(watcher, os.path.join(root, "daemon.sock"))
+            with contextlib.redirect_stdout(io.StringIO()):
+                cold = watcher.rebuild(watcher.poll() | set(watcher.snapshot))
+                self.assertEqual(cold["rendered"], self.PAGES)
+                page = os.path.join(content, "section-1", "section-0", "page-1", "index.md")
+                warm = []
+                for i in range(3):
+                    with open(page, "a") as f:
+                        f.write(f"\nAn edit {i}.\n")
+                    response = daemon.handle({"command": "build"})
+                    self.assertTrue(response["ok"])
+                    self.assertEqual(response["rendered"], 1)
+                    warm.append(response["elapsed_ms"])
+            self.assertLess(min(warm) * 25, cold["elapsed_ms"], f"cold {cold['elapsed_ms']} ms, warm {warm} ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
-from gencontent import extract_title
+from gencontent import collect_pages, extract_title, generate_pages, generate_pages_recursive
 
 class TestGenContent(unittest.TestCase):
     def test_extract_title(self):
@@ -60,5 +63,126 @@ More content.
         title = extract_title(md_with_title_and_subtitle)
         self.assertEqual(title, "Main Title")
 
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        pages = {
+            "index.md": "# Home\n\n[About](/about)",
+            os.path.join("blog", "a", "index.md"): "# Post A\n\n- **one**\n- two",
+            os.path.join("blog", "b", "index.md"): "# Post B\n\n![pic](/images/b.png)",
+        }
+        for path, markdown in pages.items():
+            path = os.path.join(self.content, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(markdown)
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_collect_pages(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(
+            [os.path.relpath(dest_path, dest) for _, dest_path in pages],
+            [
+                os.path.join("blog", "a", "index.html"),
+                os.path.join("blog", "b", "index.html"),
+                "index.html",
+            ],
+        )
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/base", jobs=1)
+        generate_pages_recursive(self.content, self.template, parallel, "/base", jobs=3)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+        self.assertIn(
+            b'<a href="/base/about">About</a>',
+            self.read_tree(serial)["index.html"],
+        )
+
+    def test_parallel_errors_are_collected(self):
+        with open(os.path.join(self.content, "blog", "a", "index.md"), "a") as f:
+            f.write("\n\nunmatched **bold")
+        dest = os.path.join(self.tmp.name, "docs")
+        with self.assertRaises(Exception) as context:
+            generate_pages_recursive(self.content, self.template, dest, "/", jobs=2)
+        self.assertIn("failed to generate 1 page(s)", str(context.exception))
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+
+    def test_unwritable_output_reports_the_real_error(self):
+        real_open = open
+
+        def failing_open(path, mode="r", *args, **kwargs):
+            if str(path).endswith(".tmp"):
+                raise OSError(28, "No space left on device")
+            return real_open(path, mode, *args, **kwargs)
+
+        dest = os.path.join(self.tmp.name, "docs")
+        pages = [(os.path.join(self.content, "index.md"), os.path.join(dest, "index.html"))]
+        with mock.patch("builtins.open", failing_open), self.assertRaises(Exception) as context:
+            generate_pages(pages, self.template, "/")
+        self.assertIn("No space left on device", str(context.exception))
+
+    def test_serial_errors_are_collected(self):
+        with open(os.path.join(self.content, "blog", "a", "index.md"), "a") as f:
+            f.write("\n\nunmatched **bold")
+        dest = os.path.join(self.tmp.name, "docs")
+        with self.assertRaises(Exception) as context:
+            generate_pages_recursive(self.content, self.template, dest, "/", jobs=1)
+        message = str(context.exception)
+        self.assertIn("failed to generate 1 page(s)", message)
+        self.assertIn(os.path.join("blog", "a", "index.md") + ": invalid markdown, unmatched delimiter", message)
+        self.assertTrue(os.path.exists(os.path.join(dest, "blog", "b", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+
+    def test_pipelined_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        generate_pages_recursive(self.content, self.template, serial, "/base", jobs=1)
+        for jobs in (1, 2):
+            pipelined = os.path.join(self.tmp.name, f"pipelined-{jobs}")
+            generate_pages_recursive(self.content, self.template, pipelined, "/base", jobs=jobs, pipeline=1)
+            self.assertEqual(self.read_tree(serial), self.read_tree(pipelined))
+
+    def test_basepath_not_applied_inside_code(self):
+        with open(os.path.join(self.content, "index.md"), "a") as f:
+            f.write('\n\n`<a href="/x">`\n\n```\n<img src="/y.png">\n```')
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest, "/base")
+        page = self.read_tree(dest)["index.html"]
+        self.assertIn(b'<a href="/base/about">About</a>', page)
+        self.assertIn(b'<link href="/base/index.css">', page)
+        self.assertIn(b'<code><a href="/x"></code>', page)
+        self.assertIn(b'<img src="/y.png">', page)
+
+    def test_pipelined_errors_are_collected(self):
+        with open(os.path.join(self.content, "blog", "a", "index.md"), "a") as f:
+            f.write("\n\nunmatched **bold")
+        os.remove(os.path.join(self.content, "index.md"))
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, "docs"))
+        pages.append((os.path.join(self.content, "index.md"), os.path.join(self.tmp.name, "docs", "index.html")))
+        with self.assertRaises(Exception) as context:
+            generate_pages(pages, self.template, "/", pipeline=2)
+        message = str(context.exception)
+        self.assertIn("failed to generate 2 page(s)", message)
+        self.assertLess(message.index(os.path.join("a", "index.md")), message.index(os.path.join("content", "index.md")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "docs", "blog", "b", "index.html")))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
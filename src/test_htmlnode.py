@@ -128,6 +128,12 @@ class TestHtmlNode(unittest.TestCase):
         level1 = ParentNode("section", [level2], props={"id": "level1"})
         expected_html = '<section id="level1"><div class="level2"><span>Level 3</span></div></section>'
         self.assertEqual(level1.to_html(), expected_html)
+
+    def test_nodes_are_slotted(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
     
 if __name__ == "__main__": 
     unittest.main()
@@ -0,0 +1,113 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from images import Image, build_image_catalog, read_image_size, variant_name
+from manifest import BuildManifest
+from rendercontext import RenderContext
+
+
+def png_bytes(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    row = b"\x00" + b"\x80\x80\x80" * width
+    idat = zlib.compress(row * height)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", idat) + chunk(b"IEND", b"")
+
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return read_image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(png_bytes(3, 2)), (3, 2))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 8), (640, 480))
+
+    def test_jpeg_skips_segments_before_frame(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+        sof0 = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 600, 800) + b"\x03"
+        self.assertEqual(self.size_of(b"\xff\xd8" + app0 + sof0), (800, 600))
+
+    def test_webp_extended(self):
+        header = b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8
+        header += (1023).to_bytes(3, "little") + (767).to_bytes(3, "little")
+        self.assertEqual(self.size_of(header), (1024, 768))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size_of(b"not an image"))
+        self.assertIsNone(self.size_of(b"GIF89a\x01"))
+
+
+class TestImageCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.output = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "wide.png"), "wb") as f:
+            f.write(png_bytes(1000, 10))
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.output)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_catalog_records_dimensions(self):
+        catalog, _ = build_image_catalog(self.static, self.output, self.cache, self.manifest)
+        image = catalog["/images/wide.png"]
+        self.assertEqual((image["width"], image["height"]), (1000, 10))
+        self.assertEqual(image["variants"][-1], ["/images/wide.png", 1000])
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_variants_are_resized_once(self):
+        catalog, resized = build_image_catalog(self.static, self.output, self.cache, self.manifest)
+        self.assertEqual(resized, 2)
+        self.assertEqual([width for _, width in catalog["/images/wide.png"]["variants"]], [480, 960, 1000])
+        variant = os.path.join(self.output, variant_name(os.path.join("images", "wide.png"), 480))
+        self.assertEqual(read_image_size(variant), (480, 5))
+
+        _, resized = build_image_catalog(self.static, self.output, self.cache, self.manifest)
+        self.assertEqual(resized, 0)
+
+
+class TestRenderContext(unittest.TestCase):
+    images = {
+        "/images/a.png": {"width": 1000, "height": 500, "variants": [["/images/a-480w.png", 480], ["/images/a.png", 1000]]},
+    }
+
+    def test_known_image_gets_dimensions_and_srcset(self):
+        props = RenderContext("/blog", self.images).image_props("/images/a.png", "A")
+        self.assertEqual(props["width"], "1000")
+        self.assertEqual(props["height"], "500")
+        self.assertEqual(props["srcset"], "/blog/images/a-480w.png 480w, /blog/images/a.png 1000w")
+        self.assertEqual((props["loading"], props["decoding"]), ("lazy", "async"))
+
+    def test_unknown_image_is_only_lazy(self):
+        props = RenderContext("/", self.images).image_props("https://example.com/b.png", "B")
+        self.assertEqual(
+            props,
+            {"src": "https://example.com/b.png", "alt": "B", "loading": "lazy", "decoding": "async"},
+        )
+
+    def test_fingerprint_follows_images(self):
+        self.assertNotEqual(RenderContext("/", self.images).fingerprint(), RenderContext("/", {}).fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
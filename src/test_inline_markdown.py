@@ -356,5 +356,39 @@ class TestSplitNodesDelimiter(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_empty(self):
+        self.assertListEqual([TextNode("", TextType.TEXT)], text_to_textnodes(""))
+
+    def test_text_to_textnodes_bold_takes_precedence(self):
+        nodes = text_to_textnodes("**snake_case** and _it_")
+        self.assertListEqual(
+            [
+                TextNode("snake_case", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("it", TextType.ITALIC),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_unmatched_delimiter(self):
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("a **bold** and _half")
+        self.assertEqual(str(context.exception), "invalid markdown, unmatched delimiter")
+
+    def test_text_to_textnodes_image_error_before_link_error(self):
+        with self.assertRaises(ValueError) as context:
+            text_to_textnodes("[link](/a and `x` then ![img](/b")
+        self.assertEqual(str(context.exception), "invalid markdown, image section not closed")
+
+    def test_split_link_after_image_like_text(self):
+        node = TextNode("![a](b)x [a](b)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![a](b)x ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+            split_nodes_link([node]),
+        )
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
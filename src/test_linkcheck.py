@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from assets import AssetMap
+from linkcheck import check_links, format_broken_link, site_targets
+from manifest import BuildManifest
+
+
+class TestLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.output)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, rel_path, kind="page", links=None):
+        dest_path = os.path.join(self.output, rel_path)
+        self.manifest.record(dest_path, "src/" + rel_path, {}, kind, links)
+
+    def test_site_targets(self):
+        self.record("index.html")
+        self.record(os.path.join("blog", "tom", "index.html"))
+        self.record("index.3f2a1b9c0d.css", "static")
+        self.record("index.html.gz", "compressed")
+        assets = AssetMap({"/index.css": "/index.3f2a1b9c0d.css", "/gone.css": "/gone.1234567890.css"})
+        self.assertEqual(site_targets(self.manifest, self.output, assets), {
+            "/", "/index.html", "/blog/tom", "/blog/tom/", "/blog/tom/index.html",
+            "/index.3f2a1b9c0d.css", "/index.css",
+        })
+
+    def test_reports_broken_links(self):
+        self.record("index.html", links=[["/blog/tom#top", 10], ["/missing", 20], ["/a%20b.png?v=1", 30]])
+        self.record(os.path.join("blog", "tom", "index.html"), links=[["/", 5]])
+        self.record("a b.png", "static")
+        checked, broken = check_links(self.manifest, self.output)
+        self.assertEqual(checked, 4)
+        self.assertEqual(broken, [("src/index.html", 20, "/missing")])
+
+    def test_resolves_relative_links_against_the_page(self):
+        self.record(os.path.join("blog", "tom", "index.html"), links=[
+            ["../majesty/", 1], ["../../index.html#top", 2], ["img.png", 3], ["../missing/", 4], ["gone.png?v=2", 5],
+        ])
+        self.record(os.path.join("blog", "majesty", "index.html"))
+        self.record("index.html")
+        self.record(os.path.join("blog", "tom", "img.png"), "static")
+        checked, broken = check_links(self.manifest, self.output)
+        self.assertEqual(checked, 5)
+        source = "src/" + os.path.join("blog", "tom", "index.html")
+        self.assertEqual(broken, [(source, 4, "../missing/"), (source, 5, "gone.png?v=2")])
+
+    def test_format_broken_link_position(self):
+        source = os.path.join(self.tmp.name, "page.md")
+        with open(source, "w") as f:
+            f.write("# Title\n\nsee [x](/x)")
+        self.assertEqual(format_broken_link(source, 17, "/x"), f"{source}:3:9: broken link to /x")
+        missing = os.path.join(self.tmp.name, "missing.md")
+        self.assertEqual(format_broken_link(missing, 17, "/x"), f"{missing}: character 17: broken link to /x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from listing import build_listings, markdown_date, post_date, post_excerpt
+from manifest import BuildManifest
+
+
+class TestPostExcerpt(unittest.TestCase):
+    def test_first_prose_paragraph(self):
+        markdown = "# Title\n\n[< Back Home](/)\n\n![img](/a.png)\n\nSome **bold** and [a link](/x)\ntext."
+        self.assertEqual(post_excerpt(markdown), "Some bold and a link text.")
+
+    def test_truncates_at_word_boundary(self):
+        self.assertEqual(post_excerpt("# T\n\nalpha beta, gamma delta", length=17), "alpha beta…")
+
+    def test_no_paragraph(self):
+        self.assertEqual(post_excerpt("# T\n\n- a list"), "")
+
+
+class TestBuildListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.cache_path = os.path.join(root, "listings.json")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for day, name in enumerate(("a", "b", "c"), 1):
+            self.add_post(name, day)
+        self.manifest = BuildManifest(os.path.join(root, "manifest.json"), self.public)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def add_post(self, name, day, markdown=None):
+        path = os.path.join(self.content, "blog", name, "index.md")
+        self.write(path, markdown or f"# Post {name}\n\nDate: 2024-01-{day:02d}\n\nAbout {name}.")
+
+    def build(self):
+        self.manifest.seen.clear()
+        return build_listings(
+            ["blog"], self.content, self.public, self.template, "/site", 2, self.cache_path, self.manifest,
+        )
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, "blog", *parts)) as f:
+            return f.read()
+
+    def test_paginates_posts(self):
+        stats = self.build()
+        self.assertEqual((stats["posts"], stats["pages"], stats["rendered"]), (3, 2, 2))
+        self.assertEqual(
+            self.read("index.html"),
+            '<title>Blog</title><div><h1>Blog</h1>'
+            '<article><h2><a href="/site/blog/c/">Post c</a></h2><p>About c.</p></article>'
+            '<article><h2><a href="/site/blog/b/">Post b</a></h2><p>About b.</p></article>'
+            '<nav><a href="/site/blog/page/2/" rel="next">Older posts</a></nav></div>',
+        )
+        self.assertIn('<a href="/site/blog/" rel="prev">Newer posts</a>', self.read("page", "2", "index.html"))
+
+    def test_adding_a_post_renders_only_shifted_pages(self):
+        self.build()
+        stats = self.build()
+        self.assertEqual((stats["rendered"], stats["skipped"], stats["parsed"]), (0, 2, 0))
+        # An older post only joins the last page, whatever its slug.
+        self.add_post("0-old", 0)
+        stats = self.build()
+        self.assertEqual((stats["rendered"], stats["skipped"], stats["parsed"]), (1, 1, 1))
+        self.assertIn("Post 0-old", self.read("page", "2", "index.html"))
+        self.add_post("e", 5)
+        stats = self.build()
+        self.assertEqual((stats["pages"], stats["rendered"]), (3, 3))
+        self.assertIn("Post e", self.read("index.html"))
+
+    def test_removed_posts_drop_empty_pages(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "c", "index.md"))
+        stats = self.build()
+        self.assertEqual(stats["pages"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "page", "2", "index.html")))
+        self.assertNotIn("Older posts", self.read("index.html"))
+
+    def test_posts_are_dated_by_slug_prefix(self):
+        self.add_post("2030-01-02-future", 0, "# Future\n\nSoon.")
+        blog = os.path.join(self.content, "blog")
+        path = os.path.join(blog, "2030-01-02-future", "index.md")
+        self.assertEqual(post_date(path, blog), date(2030, 1, 2))
+        self.assertEqual(post_date(path, blog, "2024-03-04"), date(2024, 3, 4))
+        self.assertIsNone(post_date(os.path.join(blog, "a", "index.md"), blog))
+        self.build()
+        self.assertIn("Future", self.read("index.html").split("<article>")[1])
+
+    def test_touching_a_post_keeps_the_order(self):
+        for name in ("a", "b", "c"):
+            self.add_post(name, 0, f"# Post {name}\n\nAbout {name}.")
+        self.build()
+        self.assertLess(self.read("index.html").index("Post a"), self.read("index.html").index("Post b"))
+        os.utime(os.path.join(self.content, "blog", "c", "index.md"))
+        stats = self.build()
+        self.assertEqual((stats["rendered"], stats["skipped"]), (0, 2))
+        self.assertIn("Post c", self.read("page", "2", "index.html"))
+
+    def test_undated_posts_follow_dated_ones(self):
+        self.add_post("0-undated", 0, "# Undated\n\nNo date.")
+        self.build()
+        self.assertIn("Undated", self.read("page", "2", "index.html").split("<article>")[-1])
+
+    def test_markdown_date(self):
+        self.assertEqual(markdown_date("# T\n\nDate: 2024-05-01\n\nText"), "2024-05-01")
+        self.assertIsNone(markdown_date("# T\n\nDate: 2024-13-01"))
+        self.assertIsNone(markdown_date("# T\n\nThe date: 2024-05-01 was nice"))
+        self.assertEqual(post_excerpt("# T\n\nDate: 2024-05-01\n\nText"), "Text")
+
+    def test_titles_and_excerpts_are_escaped(self):
+        self.add_post("d", 4, "# Fish & <Chips>\n\nDate: 2024-01-04\n\nUse `<script>` tags")
+        self.build()
+        page = self.read("index.html")
+        self.assertIn("<title>Blog</title>", page)
+        self.assertIn(">Fish &amp; &lt;Chips&gt;</a>", page)
+        self.assertIn("<p>Use &lt;script&gt; tags</p>", page)
+
+    def test_listing_dir_with_index_page(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        with self.assertRaisesRegex(Exception, "has its own index.md"):
+            self.build()
+
+
+if __name__ == "__main__":
+    unittest.main()
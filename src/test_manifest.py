@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, generator_modules, hash_bytes, hash_file
+
+
+class TestGeneratorModules(unittest.TestCase):
+    def test_covers_rendering_code_only(self):
+        modules = generator_modules()
+        for name in ("gencontent", "listing", "block_markdown", "inline_markdown", "htmlnode", "template", "manifest"):
+            self.assertIn(name, modules)
+        for name in ("main", "build", "watch", "daemon", "buildclient", "server", "benchmark", "corpus", "bench_nodes"):
+            self.assertNotIn(name, modules)
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, "docs")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        self.dest_path = os.path.join(self.output_dir, "blog", "index.html")
+        os.makedirs(os.path.dirname(self.dest_path))
+        with open(self.dest_path, "w") as f:
+            f.write("<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file_matches_hash_bytes(self):
+        self.assertEqual(hash_file(self.dest_path), hash_bytes(b"<p>hi</p>"))
+
+    def test_unknown_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        self.assertFalse(manifest.is_fresh(self.dest_path, {"source": "a"}))
+
+    def test_fresh_after_save_and_load(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        manifest.save()
+
+        loaded = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertTrue(loaded.is_fresh(self.dest_path, {"source": "a"}))
+        self.assertFalse(loaded.is_fresh(self.dest_path, {"source": "b"}))
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        os.remove(self.dest_path)
+        self.assertFalse(manifest.is_fresh(self.dest_path, {"source": "a"}))
+
+    def test_remove_orphans(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        manifest.save()
+
+        loaded = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertEqual(loaded.remove_orphans(), [self.dest_path])
+        self.assertFalse(os.path.exists(self.dest_path))
+        self.assertFalse(os.path.exists(os.path.dirname(self.dest_path)))
+        self.assertTrue(os.path.exists(self.output_dir))
+
+    def test_remove_orphans_by_kind(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        manifest.record("other.css", "other.css", {}, "static")
+        manifest.seen.clear()
+        self.assertEqual(manifest.remove_orphans("static"), ["other.css"])
+        self.assertEqual(list(manifest.entries), [self.dest_path])
+
+    def test_save_changes_appends_to_the_journal(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        for name in ("a.css", "b.css", "other.css"):
+            manifest.record(name, name, {}, "static")
+        manifest.save()
+        with open(self.manifest_path) as f:
+            saved = f.read()
+
+        manifest.record(self.dest_path, "index.md", {"source": "b"})
+        manifest.remove("other.css")
+        manifest.save_changes()
+        with open(self.manifest_path) as f:
+            self.assertEqual(f.read(), saved)
+        loaded = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertEqual(loaded.entries, manifest.entries)
+        self.assertEqual(loaded.journal_length, 2)
+
+        manifest.save()
+        self.assertFalse(os.path.exists(manifest.journal_path()))
+        self.assertEqual(BuildManifest(self.manifest_path, self.output_dir).load().entries, manifest.entries)
+
+    def test_journal_is_folded_in_once_it_outgrows_the_manifest(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        manifest.save()
+        manifest.record(self.dest_path, "index.md", {"source": "b"})
+        manifest.save_changes()
+        self.assertEqual(manifest.journal_length, 1)
+        manifest.record(self.dest_path, "index.md", {"source": "c"})
+        manifest.save_changes()
+        self.assertEqual(manifest.journal_length, 0)
+        self.assertFalse(os.path.exists(manifest.journal_path()))
+        loaded = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertTrue(loaded.is_fresh(self.dest_path, {"source": "c"}))
+
+    def test_truncated_journal_line_is_ignored(self):
+        manifest = BuildManifest(self.manifest_path, self.output_dir)
+        manifest.record(self.dest_path, "index.md", {"source": "a"})
+        manifest.save()
+        with open(manifest.journal_path(), "w") as f:
+            f.write('["' + self.dest_path + '", {"inpu')
+        loaded = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertTrue(loaded.is_fresh(self.dest_path, {"source": "a"}))
+
+    def test_corrupt_manifest_is_ignored(self):
+        with open(self.manifest_path, "w") as f:
+            f.write("{not json")
+        manifest = BuildManifest(self.manifest_path, self.output_dir).load()
+        self.assertEqual(manifest.entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
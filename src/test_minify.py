@@ -0,0 +1,70 @@
+import unittest
+
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from minify import Minifier
+from template import compile_template
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_template(self):
+        html = """<!doctype html>
+<html>
+  <head>
+    <!-- comment -->
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <span>a</span> <span>b</span>
+    <pre>  keep
+    this  </pre>
+  </body>
+</html>
+"""
+        minifier = Minifier()
+        minified = minifier.html(html)
+        self.assertEqual(
+            minified,
+            "<!doctype html><html><head><meta charset=utf-8><title>{{ Title }}</title>"
+            "<link href=/index.css rel=stylesheet></head><body><span>a</span> <span>b</span>"
+            "<pre>  keep\n    this  </pre></body></html>",
+        )
+        self.assertEqual(minifier.saved, len(html) - len(minified))
+
+    def test_values_that_need_quotes_keep_them(self):
+        minified = Minifier().html('<meta content="a, b=1"><a href="">x</a><a title=\'q\'>y</a>')
+        self.assertEqual(minified, '<meta content="a, b=1"><a href="">x</a><a title=\'q\'>y</a>')
+
+    def test_compiled_template_records_savings(self):
+        template = compile_template('<p>\n  <a href="/x">{{ Title }}</a>\n</p>\n', "/base", minify=True)
+        self.assertEqual(template.render({"Title": "T"}), "<p><a href=/base/x>T</a></p>")
+        self.assertEqual(template.saved, 7)
+
+
+class TestMinifyNodes(unittest.TestCase):
+    def test_text_and_props(self):
+        node = ParentNode("p", [
+            LeafNode(None, "two  spaces\nand a line"),
+            LeafNode("a", "link", {"href": "/x", "title": "two words"}),
+            LeafNode("img", "", {"src": "/a.png", "alt": ""}),
+        ])
+        minifier = Minifier()
+        html = node.to_html(minifier)
+        self.assertEqual(
+            html,
+            '<p>two spaces and a line<a href=/x title="two words">link</a><img src=/a.png alt=""></p>',
+        )
+        self.assertEqual(minifier.saved, len(node.to_html()) - len(html))
+
+    def test_code_blocks_are_preserved(self):
+        node = markdown_to_html_node("```\nif x:\n    y  =  1\n```\n\nsome   text `a  b`")
+        self.assertEqual(
+            node.to_html(Minifier()),
+            "<div><pre><code>if x:\n    y  =  1\n</code></pre><p>some text <code>a  b</code></p></div>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
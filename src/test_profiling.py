@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from profiling import BuildProfiler, stage_timer
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_stage_accumulates(self):
+        profiler = BuildProfiler()
+        with profiler.stage("parse"):
+            pass
+        with profiler.stage("parse"):
+            pass
+        seconds, calls = profiler.stages["parse"]
+        self.assertEqual(calls, 2)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_stage_timer_without_profiler(self):
+        with stage_timer(None, "parse"):
+            pass
+
+    def test_report_lists_slowest_pages(self):
+        profiler = BuildProfiler(top=1)
+        profiler.add_page("fast.md", 0.001, 10, 20)
+        profiler.add_page("slow.md", 0.5, 30, 40)
+        report = profiler.report()
+        self.assertIn("Slowest 1 of 2 pages:", report)
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+
+    def test_profiled_build_matches_plain_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[link](/a) and **bold**")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write('<title>{{ Title }}</title><a href="/">{{ Content }}</a>')
+
+            profiler = BuildProfiler()
+            generate_pages_recursive(content, template, os.path.join(tmp, "a"), "/base")
+            generate_pages_recursive(content, template, os.path.join(tmp, "b"), "/base", profiler=profiler)
+            with open(os.path.join(tmp, "a", "index.html")) as a, open(os.path.join(tmp, "b", "index.html")) as b:
+                self.assertEqual(a.read(), b.read())
+            # One "parse" per block: the profiled build runs the streaming path.
+            self.assertEqual(profiler.stages["parse"][1], 2)
+            self.assertIn("read", profiler.stages)
+            self.assertEqual(len(profiler.pages), 1)
+
+    def test_profiled_build_uses_block_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n" + "A long paragraph. " * 20)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            cache_path = os.path.join(tmp, "blocks.sqlite3")
+            for expected in ({"hits": 0, "misses": 1}, {"hits": 1, "misses": 0}):
+                profiler = BuildProfiler()
+                page_stats = {"hits": 0, "misses": 0}
+                generate_pages_recursive(
+                    content, template, os.path.join(tmp, "docs"), "/",
+                    profiler=profiler, cache_path=cache_path, page_stats=page_stats,
+                )
+                self.assertEqual(
+                    {key: page_stats[key] for key in expected}, expected
+                )
+                self.assertIn("cache", profiler.stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from search import SHARD_TARGET_TERMS, SearchIndex, assign_ids, build_search_index, page_terms, page_url, shard_name, shard_prefix_length
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_weights_and_filters(self):
+        markdown = (
+            "# Tolkien Fans\n\n"
+            "## Elves\n\n"
+            "The **elves** of [Rivendell](/rivendell) and a tolkien quote.\n\n"
+            "- Gandalf\n- elves\n\n"
+            "```\nhidden code\n```"
+        )
+        terms = page_terms(markdown)
+        self.assertEqual(terms["tolkien"], 6)
+        self.assertEqual(terms["elves"], 5)
+        self.assertEqual(terms["rivendell"], 1)
+        self.assertEqual(terms["gandalf"], 1)
+        self.assertNotIn("the", terms)
+        self.assertNotIn("a", terms)
+        self.assertNotIn("hidden", terms)
+
+
+class TestHelpers(unittest.TestCase):
+    def test_shard_name(self):
+        self.assertEqual(shard_name("gandalf", 2), "ga")
+        self.assertEqual(shard_name("gandalf", 1), "g")
+        self.assertEqual(shard_name("gandalf", 0), "all")
+        self.assertEqual(shard_name("x1", 2), "x1")
+        self.assertEqual(shard_name("éowyn", 2), "_c3a96f")
+
+    def test_shard_prefix_length(self):
+        self.assertEqual(shard_prefix_length(0), 0)
+        self.assertEqual(shard_prefix_length(SHARD_TARGET_TERMS), 0)
+        self.assertEqual(shard_prefix_length(SHARD_TARGET_TERMS + 1), 1)
+        self.assertEqual(shard_prefix_length(SHARD_TARGET_TERMS * 26 + 1), 2)
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs", "/"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs", "/site"), "/site/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs", "/site/"), "/site/about.html")
+
+    def test_assign_ids_keeps_existing_and_fills_gaps(self):
+        old = {"a": {"id": 0}, "c": {"id": 2}}
+        self.assertEqual(assign_ids(["a", "b", "c", "d"], old), {"a": 0, "c": 2, "b": 1, "d": 3})
+
+
+class TestBuildSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.output = os.path.join(root, "docs")
+        self.cache_path = os.path.join(root, "cache", "search.json")
+        os.makedirs(self.content)
+        self.pages = []
+        for name, markdown in [("a", "# Alpha\n\nGandalf the grey"), ("b", "# Beta\n\nGandalf and Frodo")]:
+            path = os.path.join(self.content, name + ".md")
+            self.write(path, markdown)
+            self.pages.append((path, os.path.join(self.output, name + ".html")))
+        self.manifest = BuildManifest(os.path.join(root, "manifest.json"), self.output)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read_json(self, name):
+        with open(os.path.join(self.output, "search", name)) as f:
+            return json.load(f)
+
+    def test_writes_index_and_shards(self):
+        stats = build_search_index(self.pages, self.output, "/site", self.cache_path, self.manifest)
+        self.assertEqual(stats["pages"], 2)
+        self.assertEqual(stats["indexed"], 2)
+        index = self.read_json("index.json")
+        self.assertEqual(index["pages"], [["/site/a.html", "Alpha"], ["/site/b.html", "Beta"]])
+        self.assertEqual((index["prefix_length"], index["shards"]), (0, ["all"]))
+        self.assertEqual(self.read_json("all.json")["gandalf"], [[0, 1], [1, 1]])
+        self.assertEqual(self.read_json("all.json")["frodo"], [[1, 1]])
+        self.assertEqual(self.manifest.entries[os.path.join(self.output, "search", "all.json")]["kind"], "search")
+
+    def test_small_corpus_writes_one_shard(self):
+        words = " ".join(f"word{i}" for i in range(SHARD_TARGET_TERMS - 10))
+        self.write(self.pages[0][0], "# Alpha\n\n" + words)
+        stats = build_search_index(self.pages, self.output, "/", self.cache_path, self.manifest)
+        self.assertEqual(stats["shards"], 1)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.output, "search"))), ["all.json", "index.json"])
+
+    def test_larger_corpus_is_split_by_first_letter(self):
+        words = " ".join(f"{letter}word{i}" for letter in "abc" for i in range(SHARD_TARGET_TERMS // 2))
+        self.write(self.pages[0][0], "# Alpha\n\n" + words)
+        stats = build_search_index(self.pages, self.output, "/", self.cache_path, self.manifest)
+        index = self.read_json("index.json")
+        self.assertEqual(index["prefix_length"], 1)
+        self.assertEqual(index["shards"], ["a", "b", "c", "f", "g"])
+        self.assertEqual(stats["shards"], 5)
+        self.assertEqual(self.read_json("g.json"), {"gandalf": [[1, 1]]})
+
+    def test_incremental_update(self):
+        build_search_index(self.pages, self.output, "/", self.cache_path, self.manifest)
+        stats = build_search_index(self.pages, self.output, "/", self.cache_path, self.manifest)
+        self.assertEqual((stats["indexed"], stats["written"]), (0, 0))
+
+        self.write(self.pages[1][0], "# Beta\n\nGandalf and Sam")
+        self.manifest.seen.clear()
+        stats = build_search_index(self.pages, self.output, "/", self.cache_path, self.manifest)
+        self.assertEqual(stats["indexed"], 1)
+        self.assertEqual(stats["written"], 1)
+        shard = self.read_json("all.json")
+        self.assertNotIn("frodo", shard)
+        self.assertEqual(shard["sam"], [[1, 1]])
+
+    def test_removed_page_keeps_other_ids(self):
+        build_search_index(self.pages, self.output, "/", self.cache_path)
+        stats = build_search_index(self.pages[1:], self.output, "/", self.cache_path)
+        self.assertEqual(stats["indexed"], 0)
+        self.assertEqual(self.read_json("index.json")["pages"], [None, ["/b.html", "Beta"]])
+
+    def read_search_dir(self):
+        search_dir = os.path.join(self.output, "search")
+        return {name: self.read_json(name) for name in sorted(os.listdir(search_dir))}
+
+    def test_kept_index_matches_a_fresh_build(self):
+        index = SearchIndex(self.output, "/", self.cache_path)
+        index.update(self.pages, self.manifest)
+        self.write(self.pages[1][0], "# Beta\n\nGandalf and Sam")
+        stats = index.update(self.pages, self.manifest)
+        self.assertEqual((stats["indexed"], stats["written"]), (1, 1))
+        self.assertEqual(self.read_json("all.json")["sam"], [[1, 1]])
+
+        # Enough new terms to split the shards, and a removed page.
+        words = " ".join(f"{letter}word{i}" for letter in "abc" for i in range(SHARD_TARGET_TERMS // 2))
+        gamma = os.path.join(self.content, "c.md")
+        self.write(gamma, "# Gamma\n\n" + words)
+        pages = [self.pages[1], (gamma, os.path.join(self.output, "c.html"))]
+        index.update(pages, self.manifest)
+        index.update(pages, self.manifest)
+        kept = self.read_search_dir()
+        self.assertNotIn("all.json", kept)
+        index.save()
+
+        shutil.rmtree(os.path.join(self.output, "search"))
+        build_search_index(pages, self.output, "/", self.cache_path)
+        self.assertEqual(self.read_search_dir(), kept)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from server import PreviewServer, PreviewSite, accepts_gzip, parse_etags
+
+
+class TestPreviewServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n" + "Some text. " * 200)
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n[post](/blog/post)")
+        self.write(os.path.join(self.static, "index.css"), "body { color: red; }")
+
+        site = PreviewSite(self.content, self.static, self.template, "/site")
+        self.server = PreviewServer(("127.0.0.1", 0), site, verbose=False)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def get(self, path, headers=None):
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_renders_page_under_basepath(self):
+        response, body = self.get("/site/blog/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertIn(b'<link href="/site/index.css">', body)
+        self.assertIn(b'<a href="/site/blog/post">post</a>', body)
+
+    def test_redirects_and_not_found(self):
+        response, _ = self.get("/")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/site/")
+        response, _ = self.get("/site/blog")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/site/blog/")
+        response, _ = self.get("/site/missing/")
+        self.assertEqual(response.status, 404)
+        response, _ = self.get("/site/../template.html")
+        self.assertEqual(response.status, 404)
+        response, _ = self.get("/other/")
+        self.assertEqual(response.status, 404)
+
+    def test_serves_static_files(self):
+        response, body = self.get("/site/index.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+        self.assertEqual(body, b"body { color: red; }")
+
+    def test_etag_returns_not_modified(self):
+        response, _ = self.get("/site/blog/")
+        etag = response.getheader("ETag")
+        response, body = self.get("/site/blog/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_change_invalidates_cached_page(self):
+        response, _ = self.get("/site/blog/")
+        etag = response.getheader("ETag")
+        path = os.path.join(self.content, "blog", "index.md")
+        self.write(path, "# Blog\n\nUpdated post list")
+        os.utime(path, ns=(0, 0))
+        response, body = self.get("/site/blog/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"Updated post list", body)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+
+    def test_gzip_when_accepted(self):
+        response, plain = self.get("/site/")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        response, body = self.get("/site/", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+        response, _ = self.get("/site/", {"Accept-Encoding": "gzip", "If-None-Match": response.getheader("ETag")})
+        self.assertEqual(response.status, 304)
+
+    def test_small_responses_are_not_compressed(self):
+        response, _ = self.get("/site/index.css", {"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+
+
+class TestHeaders(unittest.TestCase):
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.8"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("identity"))
+
+    def test_parse_etags(self):
+        self.assertEqual(parse_etags('"a", W/"b"'), {'"a"', '"b"'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import collect_pages, generate_pages_recursive, page_build_inputs
+from manifest import BuildManifest
+from shards import merge_shard_manifests, parse_shard, select_shard, shard_of, shard_path
+
+
+class TestShardAssignment(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+        self.assertEqual(shard_of(os.path.join("blog", "tom", "index.md"), 4), shard_of("blog/tom/index.md", 4))
+        self.assertEqual(shard_of("index.md", 1), 1)
+        shards = {shard_of(f"post-{i}.md", 4) for i in range(100)}
+        self.assertEqual(shards, {1, 2, 3, 4})
+
+    def test_select_shard_partitions_pages(self):
+        pages = [(os.path.join("content", f"p{i}.md"), f"docs/p{i}.html") for i in range(20)]
+        selected = [select_shard(pages, "content", (index, 3)) for index in (1, 2, 3)]
+        self.assertEqual(sorted(page for shard in selected for page in shard), sorted(pages))
+
+    def test_shard_path(self):
+        self.assertEqual(shard_path("./.cache/m.json", (2, 4)), "./.cache/m.shard-2-of-4.json")
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        for i in range(6):
+            self.write(os.path.join(self.content, f"p{i}", "index.md"), f"# Page {i}")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build_shard(self, shard, basepath="/"):
+        manifest = BuildManifest(shard_path(self.manifest_path, shard), self.public, shard).load()
+        generate_pages_recursive(self.content, self.template, self.public, basepath, manifest, shard=shard)
+        manifest.remove_orphans("page")
+        manifest.save()
+
+    def merge(self, count=2):
+        manifest = BuildManifest(self.manifest_path, self.public)
+        pages = collect_pages(self.content, self.public)
+        build_inputs = page_build_inputs(self.template, "/")
+        return manifest, merge_shard_manifests(manifest, self.manifest_path, pages, self.content, count, build_inputs)
+
+    def test_merge_combines_shards(self):
+        self.build_shard((1, 2))
+        self.build_shard((2, 2))
+        manifest, merged = self.merge()
+        self.assertEqual(merged, 6)
+        self.assertEqual(len(manifest.entries), 6)
+        dest_path = os.path.join(self.public, "p0", "index.html")
+        inputs = manifest.entries[dest_path]["inputs"]
+        self.assertEqual(inputs["template"], page_build_inputs(self.template, "/")["template"])
+        self.assertIn(dest_path, manifest.seen)
+
+    def test_merge_reports_missing_and_stale_shards(self):
+        self.build_shard((1, 2))
+        with self.assertRaisesRegex(Exception, "no manifest at .*shard-2-of-2.json"):
+            self.merge()
+        self.build_shard((2, 2))
+        page = next(path for path, _ in collect_pages(self.content, self.public))
+        self.write(page, "# Changed")
+        with self.assertRaisesRegex(Exception, "is out of date with"):
+            self.merge()
+
+    def test_merge_rejects_mixed_settings(self):
+        self.build_shard((1, 2))
+        self.build_shard((2, 2), basepath="/other")
+        with self.assertRaisesRegex(Exception, "was built for basepath '/other'"):
+            self.merge()
+
+    def test_merge_rejects_template_changed_after_shards(self):
+        self.build_shard((1, 2))
+        self.build_shard((2, 2))
+        self.write(self.template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        with self.assertRaises(Exception) as context:
+            self.merge()
+        message = str(context.exception)
+        self.assertIn("shard 1/2: ", message)
+        self.assertIn("shard 2/2: ", message)
+        self.assertEqual(message.count("was built with a different template; rebuild the shard"), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
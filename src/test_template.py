@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from assets import AssetMap
+from template import UrlResolver, compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_literals_and_slots(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}", "/")
+        self.assertEqual(template.literals, ["<title>", "</title>", ""])
+        self.assertEqual(
+            template.slots,
+            [("Title", "{{ Title }}"), ("Content", "{{ Content }}")],
+        )
+
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>", "/")
+        html = template.render({"Title": "Home", "Content": "<p>hi</p>"})
+        self.assertEqual(html, "<title>Home</title><main><p>hi</p></main>")
+
+    def test_basepath_applied_to_literals(self):
+        template = compile_template('<link href="/index.css"><img src="/a.png">{{ Content }}', "/base")
+        self.assertEqual(
+            template.render({"Content": '<a href="/x">x</a>'}),
+            '<link href="/base/index.css"><img src="/base/a.png"><a href="/x">x</a>',
+        )
+
+    def test_repeated_and_unknown_placeholders(self):
+        template = compile_template("{{ Title }} - {{ Title }} {{ Unknown }}", "/")
+        self.assertEqual(template.render({"Title": "T"}), "T - T {{ Unknown }}")
+
+    def test_no_placeholders(self):
+        template = compile_template("<p>static</p>", "/")
+        self.assertEqual(template.render({}), "<p>static</p>")
+
+    def test_load_template_is_cached_until_modified(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            first = load_template(path, "/")
+            self.assertIs(load_template(path, "/"), first)
+
+            with open(path, "w") as f:
+                f.write("<h2>{{ Title }}</h2>!")
+            self.assertEqual(load_template(path, "/").render({"Title": "T"}), "<h2>T</h2>!")
+
+
+class TestUrlResolver(unittest.TestCase):
+    def test_basepath_prefix(self):
+        self.assertEqual(UrlResolver("/base").resolve("/x"), "/base/x")
+        self.assertEqual(UrlResolver("/").resolve("/x"), "/x")
+
+    def test_external_and_protocol_relative_urls_are_kept(self):
+        resolver = UrlResolver("/base")
+        self.assertEqual(resolver.resolve("https://example.com/a"), "https://example.com/a")
+        self.assertEqual(resolver.resolve("//cdn.example.com/a.js"), "//cdn.example.com/a.js")
+
+    def test_fingerprinted_assets_keep_query_and_fragment(self):
+        resolver = UrlResolver("/base", AssetMap({"/a.css": "/a.123.css"}))
+        self.assertEqual(resolver.resolve("/a.css?v=1#top"), "/base/a.123.css?v=1#top")
+        self.assertEqual(resolver.resolve("/b.css"), "/base/b.css")
+
+    def test_rewrite_only_touches_href_and_src(self):
+        resolver = UrlResolver("/base", AssetMap({"/a.png": "/a.1.png"}))
+        self.assertEqual(
+            resolver.rewrite('<img src="/a.png" alt="/a.png"><a href="/">home</a>'),
+            '<img src="/base/a.1.png" alt="/a.png"><a href="/base/">home</a>',
+        )
+
+    def test_template_uses_asset_map(self):
+        template = compile_template('<link href="/a.css">{{ Content }}', "/", AssetMap({"/a.css": "/a.9.css"}))
+        self.assertEqual(template.render({"Content": ""}), '<link href="/a.9.css">')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 
+from rendercontext import RenderContext
 from textnode import TextNode, TextType, text_node_to_html_node
 
 
@@ -44,6 +45,10 @@ class TestTextNode(unittest.TestCase):
         expected_repr = "TextNode(Sample text, italic, None)"
         self.assertEqual(repr(node), expected_repr)
 
+    def test_slotted(self):
+        node = TextNode("Sample text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -86,6 +91,30 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             {"src": "https://www.boot.dev", "alt": "This is an image"},
         )
     
+    def test_image_with_context(self):
+        context = RenderContext("/", {"/a.png": {"width": 4, "height": 3, "variants": [["/a.png", 4]]}})
+        node = TextNode("A", TextType.IMAGE, "/a.png")
+        html_node = text_node_to_html_node(node, context)
+        self.assertEqual(
+            html_node.to_html(),
+            '<img src="/a.png" alt="A" width="4" height="3" loading="lazy" decoding="async"></img>',
+        )
+
+    def test_urls_resolved_with_context(self):
+        context = RenderContext("/base")
+        cases = [
+            ("/blog/tom", "/base/blog/tom"),
+            ("blog/tom", "blog/tom"),
+            ("#top", "#top"),
+            ("https://www.boot.dev", "https://www.boot.dev"),
+            ("//cdn.example.com/a.js", "//cdn.example.com/a.js"),
+        ]
+        for url, expected in cases:
+            link = text_node_to_html_node(TextNode("x", TextType.LINK, url), context)
+            image = text_node_to_html_node(TextNode("x", TextType.IMAGE, url), context)
+            self.assertEqual(link.props["href"], expected)
+            self.assertEqual(image.props["src"], expected)
+
     def test_image_no_alt(self):
         node = TextNode("", TextType.IMAGE, "https://www.boot.dev")
         html_node = text_node_to_html_node(node)
@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import watch
+from compress import compress_outputs
+from listing import build_listings
+from manifest import BuildManifest
+from watch import DependencyGraph, SiteWatcher
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_add_and_outputs_for(self):
+        graph = DependencyGraph()
+        graph.add("a.md", "a.html")
+        graph.add("template.html", "a.html")
+        graph.add("template.html", "b.html")
+        self.assertEqual(graph.outputs_for("template.html"), {"a.html", "b.html"})
+        self.assertEqual(graph.outputs_for("missing.md"), set())
+
+    def test_remove_drops_output_everywhere(self):
+        graph = DependencyGraph()
+        graph.add("a.md", "a.html")
+        graph.add("template.html", "a.html")
+        self.assertEqual(graph.remove("a.md"), {"a.html"})
+        self.assertEqual(graph.outputs_for("template.html"), set())
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.manifest = BuildManifest(os.path.join(root, "manifest.json"), self.public)
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.public, "/", self.manifest,
+        )
+        self.watcher.rebuild(self.watcher.poll() | set(self.watcher.snapshot))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def test_initial_rebuild(self):
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertEqual(self.read("index.css"), "body {}")
+
+    def test_markdown_edit_renders_one_page(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home page")
+        rendered = self.manifest.rendered
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertEqual(self.manifest.rendered - rendered, 1)
+        self.assertEqual(self.read("index.html"), "<title>Home page</title><div><h1>Home page</h1></div>")
+
+    def test_template_edit_renders_every_page(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        rendered = self.manifest.rendered
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertEqual(self.manifest.rendered - rendered, 2)
+        self.assertEqual(self.read("blog", "index.html"), "<h1>Blog</h1>")
+
+    def test_new_and_deleted_sources(self):
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.write(os.path.join(self.content, "about.md"), "# About")
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertEqual(self.read("about.html"), "<title>About</title><div><h1>About</h1></div>")
+
+
+class TestSiteWatcherSiteSteps(unittest.TestCase):
+    # Listings, search, compression and link checking only cover what a
+    # rebuild changed.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[First](/posts/first.html)")
+        self.write(os.path.join(self.content, "posts", "first.md"), "# First\n\nDate: 2024-01-01\n\nGandalf arrives.")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = BuildManifest(self.manifest_path, self.public)
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.public, "/", self.manifest,
+            compress_min_size=0,
+            search_cache_path=os.path.join(root, "search.json"),
+            listing_dirs=("posts",),
+            listing_cache_path=os.path.join(root, "listings.json"),
+        )
+        self.watcher.rebuild(self.watcher.poll() | set(self.watcher.snapshot))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def rebuild(self):
+        with mock.patch.object(watch, "build_listings", wraps=build_listings) as listings, \
+                mock.patch.object(watch, "compress_outputs", wraps=compress_outputs) as compress:
+            summary = self.watcher.rebuild(self.watcher.poll())
+        return summary, listings, compress
+
+    def test_page_outside_listings_skips_them(self):
+        # Same title and search terms: only the page itself changes.
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[The first](/posts/first.html)")
+        summary, listings, compress = self.rebuild()
+        listings.assert_not_called()
+        index_html = os.path.join(self.public, "index.html")
+        self.assertEqual(compress.call_args.kwargs["dest_paths"], {index_html})
+        self.assertTrue(os.path.exists(index_html + ".gz"))
+
+    def test_post_edit_updates_listing_and_search(self):
+        self.write(os.path.join(self.content, "posts", "first.md"), "# First\n\nDate: 2024-01-01\n\nFrodo arrives.")
+        summary, listings, compress = self.rebuild()
+        listings.assert_called_once()
+        with open(os.path.join(self.public, "posts", "index.html")) as f:
+            self.assertIn("Frodo arrives.", f.read())
+        with open(os.path.join(self.public, "search", "all.json")) as f:
+            terms = json.load(f)
+        self.assertIn("frodo", terms)
+        self.assertNotIn("gandalf", terms)
+
+    def test_links_broken_by_a_removed_page(self):
+        os.remove(os.path.join(self.content, "posts", "first.md"))
+        summary, listings, compress = self.rebuild()
+        self.assertEqual(summary["broken_links"], 1)
+        self.write(os.path.join(self.content, "posts", "first.md"), "# First")
+        summary, listings, compress = self.rebuild()
+        self.assertEqual(summary["broken_links"], 0)
+
+    def test_steps_after_a_failed_rebuild_are_run_again(self):
+        second = os.path.join(self.public, "posts", "second.html")
+        self.write(os.path.join(self.content, "posts", "second.md"), "# Second")
+        self.write(os.path.join(self.content, "posts", "index.md"), "# Posts")
+        summary, listings, compress = self.rebuild()
+        self.assertIsNotNone(summary["error"])
+        self.assertTrue(os.path.exists(second))
+        self.assertFalse(os.path.exists(second + ".gz"))
+
+        os.remove(os.path.join(self.content, "posts", "index.md"))
+        summary, listings, compress = self.rebuild()
+        self.assertIsNone(summary["error"])
+        self.assertTrue(os.path.exists(second + ".gz"))
+
+    def test_manifest_changes_are_journaled(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home page")
+        self.rebuild()
+        self.assertTrue(os.path.exists(self.manifest.journal_path()))
+        loaded = BuildManifest(self.manifest_path, self.public).load()
+        self.assertEqual(loaded.entries, self.manifest.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
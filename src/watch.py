@@ -0,0 +1,334 @@
+import os
+import time
+
+from assets import AssetMap, should_fingerprint
+from compress import compress_outputs
+from copystatic import sync_file, sync_static_files
+from gencontent import collect_pages, generate_pages, page_build_inputs
+from images import IMAGE_EXTENSIONS, build_image_catalog
+from linkcheck import TARGET_KINDS, broken_links, format_broken_link, output_urls, site_targets
+from listing import build_listings
+from manifest import hash_file
+from rendercontext import RenderContext
+from search import SearchIndex
+
+
+class DependencyGraph:
+    def __init__(self):
+        self.outputs = {}
+
+    def add(self, source_path, output_path):
+        self.outputs.setdefault(source_path, set()).add(output_path)
+
+    def outputs_for(self, source_path):
+        return self.outputs.get(source_path, set())
+
+    def remove(self, source_path):
+        outputs = self.outputs.pop(source_path, set())
+        for other_outputs in self.outputs.values():
+            other_outputs -= outputs
+        return outputs
+
+
+def snapshot_files(dir_path, snapshot):
+    for entry in os.scandir(dir_path):
+        if entry.is_dir():
+            snapshot_files(entry.path, snapshot)
+        else:
+            stat = entry.stat()
+            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+class SiteWatcher:
+    def __init__(self, dir_path_content, dir_path_static, template_path, dir_path_public, basepath, manifest, *, hash_static=False, cache_path=None, compress_min_size=None, context=None, image_cache_dir=None, search_cache_path=None, listing_dirs=(), listing_page_size=10, listing_cache_path=None):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dir_path_public = dir_path_public
+        self.basepath = basepath
+        self.manifest = manifest
+        self.hash_static = hash_static
+        self.cache_path = cache_path
+        self.compress_min_size = compress_min_size
+        self.context = context
+        self.image_cache_dir = image_cache_dir
+        self.search_cache_path = search_cache_path
+        self.listing_dirs = listing_dirs
+        self.listing_page_size = listing_page_size
+        self.listing_cache_path = listing_cache_path
+        self.build_inputs = page_build_inputs(template_path, basepath, context)
+
+        self.graph = DependencyGraph()
+        self.page_sources = {}
+        # Pages whose last render failed, retried on every rebuild until
+        # they render, and the error of the last rebuild if it failed.
+        self.failed_pages = {}
+        self.last_error = None
+        # Outputs written by a failed rebuild, whose listings, search,
+        # compression and link checks are run again by the next one.
+        self.unfinished_outputs = None
+        for from_path, dest_path in collect_pages(dir_path_content, dir_path_public):
+            self.add_page(from_path, dest_path)
+        self.snapshot = self.take_snapshot()
+        for path in self.snapshot:
+            if self.is_static(path):
+                self.graph.add(path, self.static_dest(path))
+
+        # The site-wide steps are kept up to date a rebuild at a time: the
+        # search index stays in memory, and the link targets and broken
+        # links are updated for the outputs each rebuild writes.
+        self.search_index = None
+        if search_cache_path is not None:
+            self.search_index = SearchIndex(dir_path_public, basepath, search_cache_path)
+            self.search_index.update(self.search_pages(), manifest)
+        self.targets = set()
+        self.broken = {}
+        self.check_links(set(), full=True)
+
+    def add_page(self, from_path, dest_path):
+        self.page_sources[dest_path] = from_path
+        self.graph.add(from_path, dest_path)
+        self.graph.add(self.template_path, dest_path)
+
+    def search_pages(self):
+        return sorted((from_path, dest_path) for dest_path, from_path in self.page_sources.items())
+
+    def in_listing(self, path):
+        for listing_dir in self.listing_dirs:
+            if path.startswith(os.path.join(self.dir_path_content, listing_dir.strip("/")) + os.sep):
+                return True
+        return False
+
+    def is_page(self, path):
+        return path.startswith(self.dir_path_content + os.sep) and path.endswith(".md")
+
+    def is_static(self, path):
+        return path.startswith(self.dir_path_static + os.sep)
+
+    def is_image(self, path):
+        return self.context is not None and self.context.images is not None and path.lower().endswith(IMAGE_EXTENSIONS)
+
+    def is_fingerprinted(self, path):
+        return self.context is not None and self.context.assets is not None and should_fingerprint(path)
+
+    def refresh_context(self, resync_assets, stats):
+        assets = self.context.assets
+        if resync_assets:
+            assets = AssetMap()
+            sync_stats = sync_static_files(
+                self.dir_path_static, self.dir_path_public, self.manifest, self.hash_static, assets,
+            )
+            for name, count in sync_stats.items():
+                stats[name] += count
+        catalog = self.context.images
+        if catalog is not None:
+            catalog, resized = build_image_catalog(
+                self.dir_path_static, self.dir_path_public, self.image_cache_dir, self.manifest, assets=assets,
+            )
+        self.context = RenderContext(self.basepath, catalog, assets, self.context.minify)
+        self.build_inputs = page_build_inputs(self.template_path, self.basepath, self.context)
+
+    def page_dest(self, path):
+        relative = os.path.relpath(path, self.dir_path_content)
+        return os.path.join(self.dir_path_public, relative)[:-3] + ".html"
+
+    def static_dest(self, path):
+        relative = os.path.relpath(path, self.dir_path_static)
+        return os.path.join(self.dir_path_public, relative)
+
+    def take_snapshot(self):
+        snapshot = {}
+        snapshot_files(self.dir_path_content, snapshot)
+        snapshot_files(self.dir_path_static, snapshot)
+        if os.path.exists(self.template_path):
+            stat = os.stat(self.template_path)
+            snapshot[self.template_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self):
+        snapshot = self.take_snapshot()
+        changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        changed |= set(self.snapshot) - set(snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def run(self, interval=0.1, debounce=0.05):
+        print(f"Watching {self.dir_path_content}, {self.dir_path_static} and {self.template_path} (Ctrl+C to stop)...")
+        try:
+            while True:
+                time.sleep(interval)
+                changed = self.poll()
+                if not changed:
+                    continue
+                # Wait for a quiet poll so a burst of saves becomes one rebuild.
+                while True:
+                    time.sleep(debounce)
+                    more = self.poll()
+                    if not more:
+                        break
+                    changed |= more
+                self.rebuild(changed)
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+        finally:
+            self.close()
+
+    def close(self):
+        # The search cache is only read by the next cold build, so it is
+        # written once when watching stops rather than on every rebuild.
+        if self.search_index is not None:
+            self.search_index.save()
+
+    def rebuild(self, changed):
+        start = time.perf_counter()
+        pages = {}
+        stats = {"copied": 0, "skipped": 0, "removed": 0}
+        images_changed = False
+        assets_changed = False
+        sources_changed = False
+        listings_changed = False
+        for path in sorted(changed):
+            exists = path in self.snapshot
+            if path == self.template_path:
+                if not exists:
+                    print(f" * {path} was deleted; keeping the last build")
+                    continue
+                self.build_inputs = page_build_inputs(self.template_path, self.basepath, self.context)
+                listings_changed = True
+                for dest_path in self.graph.outputs_for(path):
+                    pages[dest_path] = self.page_sources[dest_path]
+            elif self.is_page(path):
+                sources_changed = True
+                listings_changed = listings_changed or self.in_listing(path)
+                if not exists:
+                    for dest_path in self.graph.remove(path):
+                        self.page_sources.pop(dest_path, None)
+                        self.manifest.remove(dest_path)
+                        stats["removed"] += 1
+                    continue
+                if not self.graph.outputs_for(path):
+                    self.add_page(path, self.page_dest(path))
+                for dest_path in self.graph.outputs_for(path):
+                    pages[dest_path] = path
+            elif self.is_static(path):
+                if self.is_fingerprinted(path):
+                    # Its URL changes with its content; resynced below.
+                    assets_changed = True
+                    continue
+                images_changed = images_changed or self.is_image(path)
+                if not exists:
+                    for dest_path in self.graph.remove(path):
+                        self.manifest.remove(dest_path)
+                        stats["removed"] += 1
+                    continue
+                dest_path = self.static_dest(path)
+                self.graph.add(path, dest_path)
+                sync_file(path, dest_path, self.manifest, self.hash_static, stats)
+
+        if images_changed or assets_changed:
+            # Any page may refer to the file, so all of them are re-rendered.
+            self.refresh_context(assets_changed, stats)
+            listings_changed = True
+            for dest_path, from_path in self.page_sources.items():
+                pages[dest_path] = from_path
+        for dest_path, from_path in self.failed_pages.items():
+            if self.page_sources.get(dest_path) == from_path:
+                pages[dest_path] = from_path
+        self.failed_pages = {}
+        unfinished_outputs = self.unfinished_outputs or set()
+        if self.unfinished_outputs is not None:
+            sources_changed = listings_changed = True
+
+        rendered = self.manifest.rendered
+        broken = []
+        error = None
+        try:
+            generate_pages(
+                sorted((from_path, dest_path) for dest_path, from_path in pages.items()),
+                self.template_path,
+                self.basepath,
+                self.manifest,
+                build_inputs=self.build_inputs,
+                cache_path=self.cache_path,
+                context=self.context,
+            )
+            if self.listing_dirs and listings_changed:
+                build_listings(
+                    self.listing_dirs, self.dir_path_content, self.dir_path_public, self.template_path, self.basepath,
+                    self.listing_page_size, self.listing_cache_path, self.manifest, self.context,
+                    build_inputs=self.build_inputs,
+                )
+            if self.search_index is not None and sources_changed:
+                self.search_index.update(self.search_pages(), self.manifest)
+            # Only what this rebuild wrote or removed is compressed and
+            # checked again.
+            outputs = self.manifest.dirty | unfinished_outputs
+            if self.compress_min_size is not None:
+                compress_outputs(self.manifest, min_size=self.compress_min_size, dest_paths=outputs)
+            broken = self.check_links(outputs, full=images_changed or assets_changed)
+            for source, offset, url in broken:
+                print(f" * {format_broken_link(source, offset, url)}")
+            self.unfinished_outputs = None
+        except Exception as e:
+            error = str(e)
+            print(f"Rebuild failed: {e}")
+            self.unfinished_outputs = self.manifest.dirty | unfinished_outputs
+            self.failed_pages = {
+                dest_path: from_path for dest_path, from_path in pages.items()
+                if not os.path.exists(from_path)
+                or not self.manifest.is_fresh(dest_path, dict(self.build_inputs, source=hash_file(from_path)))
+            }
+        finally:
+            self.manifest.save_changes()
+        self.last_error = error
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"Rebuilt in {elapsed:.1f} ms: {self.manifest.rendered - rendered} page(s) rendered, "
+            f"{stats['copied']} static file(s) copied, {stats['removed']} output(s) removed"
+        )
+        return {
+            "changed": len(changed),
+            "rendered": self.manifest.rendered - rendered,
+            "copied": stats["copied"],
+            "removed": stats["removed"],
+            "broken_links": sum(len(links) for links in self.broken.values()),
+            "elapsed_ms": round(elapsed, 1),
+            "error": error,
+        }
+
+    def check_links(self, outputs, full=False):
+        # Updates the site's link targets and broken links for the
+        # outputs written or removed since the last check, and returns the
+        # links that broke since then. Targets are only added to
+        # incrementally: a removed output or new asset URLs can break a
+        # link on any page, so those check the whole site again.
+        entries = self.manifest.entries
+        previous = self.broken
+        if full or any(dest_path not in entries for dest_path in outputs):
+            assets = None if self.context is None else self.context.assets
+            self.targets = site_targets(self.manifest, self.dir_path_public, assets)
+            self.broken = {}
+            checked = list(entries)
+        else:
+            target_count = len(self.targets)
+            for dest_path in outputs:
+                if entries[dest_path].get("kind", "page") in TARGET_KINDS:
+                    self.targets.update(output_urls(dest_path, self.dir_path_public))
+            checked = set(outputs)
+            if len(self.targets) > target_count:
+                # A new target may be what a broken link was missing.
+                checked.update(self.broken)
+            checked = sorted(checked)
+        reported = []
+        for dest_path in checked:
+            entry = entries.get(dest_path)
+            links = [] if entry is None else broken_links(dest_path, entry, self.dir_path_public, self.targets)
+            if links:
+                if dest_path in outputs or previous.get(dest_path) != links:
+                    reported.extend(links)
+                self.broken[dest_path] = links
+            else:
+                self.broken.pop(dest_path, None)
+        reported.sort()
+        return reported